@@ -0,0 +1,147 @@
+import pandas as pd
+import numpy as np
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from historical_price_prediction import SYMBOLS, fetch_historical_data, compute_model_features
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+CALIBRATION_BINS = 10  # Confidence buckets used for the calibration error
+
+# Walk the MA-regression model forward over one symbol's history in a single vectorized pass
+# At every day k the model is fitted on the pairs (MA of day j, price of day j + 1) for j < k, exactly what
+# predict_historical_price would have seen that day, and predicts day k + 1. Expanding-window sums come from
+# cumulative sums, so every day's fit costs O(1). Returns per-day arrays, or None without evaluable days.
+def walk_forward(ma, prices, changes):
+    rows = ma.shape[1]
+    if rows < 3:  # Need one training pair and one day with a known next price
+        return None
+
+    # Shift by the first value so the cumulative sums do not lose precision to large price levels
+    x = ma[:, :-1] - ma[:, :1]
+    y = prices[:, 1:] - prices[:, :1]
+    n = np.arange(1, rows, dtype=float)
+    sum_x = np.cumsum(x, axis=1)
+    sum_y = np.cumsum(y, axis=1)
+    sum_xx = np.cumsum(x * x, axis=1)
+    sum_xy = np.cumsum(x * y, axis=1)
+    sxx = sum_xx - sum_x * sum_x / n
+    sxy = sum_xy - sum_x * sum_y / n
+
+    # A constant feature has no usable slope; fall back to the mean target like a least-squares solver would
+    slope = np.divide(sxy, sxx, out=np.zeros_like(sxy), where=sxx > np.finfo(float).eps * sum_xx)
+    intercept = sum_y / n - slope * sum_x / n
+
+    # Fit with pairs [0, k) lives at column k - 1; evaluate days k = 1 .. rows - 2
+    days = np.arange(1, rows - 1)
+    predicted = intercept[:, days - 1] + slope[:, days - 1] * (ma[:, days] - ma[:, :1]) + prices[:, :1]
+    actual = prices[:, days + 1]
+    current = prices[:, days]
+
+    # Confidence from the sample std of up to the last 5 changes seen on day k
+    padded = np.concatenate((np.full((2, 4), np.nan), changes), axis=1)
+    windows = np.lib.stride_tricks.sliding_window_view(padded, 5, axis=1)[:, days]
+    valid = ~np.isnan(windows)
+    count = valid.sum(axis=2)
+    mean = np.where(valid, windows, 0.0).sum(axis=2) / count
+    std = np.sqrt(np.where(valid, (windows - mean[:, :, None]) ** 2, 0.0).sum(axis=2) / (count - 1))
+    confidence = np.clip(1.0 - std.mean(axis=0), 0.0, 1.0)
+    confidence = np.where(np.isnan(confidence), 1.0, confidence)
+
+    return {
+        'predicted': predicted,
+        'actual': actual,
+        'current': current,
+        'confidence': confidence
+    }
+
+# Summarize one symbol's walk-forward run: error, direction hit rate and confidence calibration
+def score_walk_forward(result):
+    predicted, actual, current, confidence = result['predicted'], result['actual'], result['current'], result['confidence']
+    abs_error = np.abs(predicted - actual)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct_error = np.where(actual != 0, abs_error / np.abs(actual), np.nan)
+    direction_hit = np.sign(predicted - current) == np.sign(actual - current)
+
+    # Expected calibration error: confidence vs. close direction hit rate, weighted by bucket size
+    buckets = np.minimum((confidence * CALIBRATION_BINS).astype(int), CALIBRATION_BINS - 1)
+    counts = np.bincount(buckets, minlength=CALIBRATION_BINS)
+    confidence_sum = np.bincount(buckets, weights=confidence, minlength=CALIBRATION_BINS)
+    hit_sum = np.bincount(buckets, weights=direction_hit[1].astype(float), minlength=CALIBRATION_BINS)
+    calibration_error = np.abs(confidence_sum - hit_sum).sum() / len(confidence)
+
+    # A useful confidence should fall as the error grows, i.e. a negative correlation
+    mean_pct_error = np.nanmean(pct_error, axis=0)
+    if np.nanstd(confidence) > 0 and np.nanstd(mean_pct_error) > 0:
+        confidence_error_corr = float(np.corrcoef(confidence, np.nan_to_num(mean_pct_error))[0, 1])
+    else:
+        confidence_error_corr = np.nan
+
+    return {
+        'days_evaluated': len(confidence),
+        'mae_open': float(abs_error[0].mean()),
+        'mae_close': float(abs_error[1].mean()),
+        'mape_open': float(np.nanmean(pct_error[0]) * 100),
+        'mape_close': float(np.nanmean(pct_error[1]) * 100),
+        'direction_accuracy_open': float(direction_hit[0].mean()),
+        'direction_accuracy_close': float(direction_hit[1].mean()),
+        'mean_confidence': float(confidence.mean()),
+        'calibration_error': float(calibration_error),
+        'confidence_error_corr': confidence_error_corr
+    }
+
+# Backtest one symbol's candle DataFrame; returns the metrics dict or None
+def backtest_symbol(df, window=5):
+    features = compute_model_features(df, window=window)
+    if features is None:
+        return None
+    result = walk_forward(*features)
+    if result is None:
+        return None
+    return score_walk_forward(result)
+
+# Backtest a {symbol: DataFrame} mapping and return one metrics row per symbol
+def backtest_frames(frames, window=5):
+    rows = []
+    for symbol, df in frames.items():
+        try:
+            metrics = backtest_symbol(df, window=window)
+        except Exception as e:
+            logger.error(f"Error backtesting {symbol}: {e}")
+            continue
+        if metrics is None:
+            logger.warning(f"Not enough history to backtest {symbol}")
+            continue
+        rows.append({'symbol': symbol, **metrics})
+    return pd.DataFrame(rows)
+
+# Fetch the full history of every symbol and backtest the universe
+def run_backtest(symbols, output_file, window=5, max_workers=16):
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        fetched = dict(zip(symbols, executor.map(fetch_historical_data, symbols)))
+    frames = {symbol: df for symbol, df in fetched.items() if df is not None and not df.empty}
+    logger.info(f"Fetched history for {len(frames)}/{len(symbols)} symbols")
+
+    report = backtest_frames(frames, window=window)
+    if report.empty:
+        logger.error("No symbol had enough history to backtest")
+        return report
+
+    os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+    report.to_csv(output_file, index=False)
+    weights = report['days_evaluated']
+    logger.info(f"Backtested {len(report)} symbols over {int(weights.sum())} symbol-days: "
+                f"MAPE close = {np.average(report['mape_close'], weights=weights):.2f}%, "
+                f"direction accuracy close = {np.average(report['direction_accuracy_close'], weights=weights):.2%}, "
+                f"calibration error = {np.average(report['calibration_error'], weights=weights):.3f}")
+    logger.info(f"Saved backtest report to {output_file}")
+    return report
+
+if __name__ == "__main__":
+    output_file = r"E:\hey\output\history prediction\backtest_report.csv"
+    logger.info(f"Starting backtest at {datetime.now().strftime('%I:%M %p %z on %B %d, %Y')}")
+    report = run_backtest(SYMBOLS, output_file)
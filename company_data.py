@@ -0,0 +1,110 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+import unicodedata
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# NEPSE companies (symbol and security name, from nepse.xlsx) and the Nepali names news uses for them
+SOURCE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "companies.json")
+# Prebuilt lookup tables of SOURCE_FILE, kept next to the bytecode cache like a .pyc
+ARTIFACT_FILE = os.environ.get("SENTIMETRICS_COMPANY_ARTIFACT",
+                               os.path.join(os.path.dirname(SOURCE_FILE), "__pycache__", "companies.pkl"))
+# Bump when the artifact's layout or the alias normalization changes, so existing artifacts are rebuilt
+ARTIFACT_VERSION = 1
+
+_tables = None
+_lock = threading.Lock()
+
+# Alias as news content is compared against it (see classified_news.detect_language_and_match)
+def normalize_alias(text):
+    return unicodedata.normalize('NFKD', text.lower().strip())
+
+def _checksum(source_bytes):
+    return hashlib.sha256(str(ARTIFACT_VERSION).encode('ascii') + b"\0" + source_bytes).hexdigest()
+
+# Lookup tables of the source data:
+#   nepse_data    {"Symbol": [...], "Security Name": [...]} in file order
+#   translations  company name -> Nepali names, as written
+#   aliases       (company name, normalized Nepali names) in file order, the order companies are matched in
+#   symbols       security name -> symbol (the first one listed for a name)
+def build_tables(source):
+    companies = source['companies']
+    symbols = {}
+    for company in companies:
+        symbols.setdefault(company['name'], company['symbol'])
+    return {
+        "nepse_data": {"Symbol": [company['symbol'] for company in companies],
+                       "Security Name": [company['name'] for company in companies]},
+        "translations": source['aliases'],
+        "aliases": [(name, tuple(normalize_alias(alias) for alias in aliases)) for name, aliases in source['aliases'].items()],
+        "symbols": symbols,
+    }
+
+# Rebuild the artifact from the source file and write it atomically; returns the tables
+def build_artifact(source_file=None, artifact_file=None):
+    source_file = source_file or SOURCE_FILE
+    artifact_file = artifact_file or ARTIFACT_FILE
+    with open(source_file, 'rb') as f:
+        source_bytes = f.read()
+    tables = build_tables(json.loads(source_bytes.decode('utf-8')))
+    try:
+        os.makedirs(os.path.dirname(artifact_file) or '.', exist_ok=True)
+        tmp_file = f"{artifact_file}.{os.getpid()}.tmp"
+        with open(tmp_file, 'wb') as f:
+            pickle.dump({"version": ARTIFACT_VERSION, "checksum": _checksum(source_bytes), "tables": tables}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, artifact_file)
+        logger.info(f"Built company artifact {artifact_file} ({len(tables['symbols'])} companies, {len(tables['aliases'])} with aliases)")
+    except Exception as e:
+        # Read-only installs still work, they just rebuild the tables in every process
+        logger.warning(f"Could not write company artifact {artifact_file}: {e}")
+    return tables
+
+# The artifact's tables when it was built from the current source file and version, else None
+def _read_artifact(source_file, artifact_file):
+    try:
+        with open(artifact_file, 'rb') as f:
+            artifact = pickle.load(f)
+        if artifact.get('version') != ARTIFACT_VERSION:
+            return None
+        with open(source_file, 'rb') as f:
+            if artifact.get('checksum') != _checksum(f.read()):
+                return None
+        return artifact['tables']
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable company artifact {artifact_file}: {e}")
+        return None
+
+# Tables of the source data, loaded on first use (from the artifact, rebuilding it when it is missing or stale)
+def tables():
+    global _tables
+    if _tables is None:
+        with _lock:
+            if _tables is None:
+                _tables = _read_artifact(SOURCE_FILE, ARTIFACT_FILE) or build_artifact()
+    return _tables
+
+def aliases():
+    return tables()['aliases']
+
+def translations():
+    return tables()['translations']
+
+def nepse_data():
+    return tables()['nepse_data']
+
+# Symbol for a company name, 'unknown' when it is not listed
+def symbol_for(company):
+    return tables()['symbols'].get(company, 'unknown')
+
+if __name__ == "__main__":
+    # Prebuild the artifact, e.g. when deploying or after editing companies.json
+    build_artifact()
@@ -0,0 +1,147 @@
+import hashlib
+import logging
+import re
+import unicodedata
+import numpy as np
+import pandas as pd
+import storage
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SHINGLE_SIZE = 4  # Characters per shingle; works for Devanagari and English alike
+FINGERPRINT_BITS = 64
+MAX_DISTANCE = 10  # SimHash bits two copies of a story may differ in before they are not even compared
+MIN_SIMILARITY = 0.7  # Jaccard similarity of the shingle sets that confirms a near-duplicate
+BLOCKS = MAX_DISTANCE + 1  # Two fingerprints within MAX_DISTANCE agree exactly on at least one block
+# Copies of a story are published within days of each other, so new articles are only matched against
+# the stored news of this many recent days instead of the whole history
+RECENT_DAYS = 14
+
+_BIT_SHIFTS = np.arange(FINGERPRINT_BITS, dtype=np.uint64)
+# Bit offsets of the blocks, as even as 64 bits allow
+_BLOCK_BOUNDS = [(FINGERPRINT_BITS * i // BLOCKS, FINGERPRINT_BITS * (i + 1) // BLOCKS) for i in range(BLOCKS)]
+
+# Text of an article as it is compared: title and summary, missing parts left out
+def item_text(title, summary):
+    return " ".join(str(part) for part in (title, summary) if isinstance(part, str) and part and part != 'N/A')
+
+# Lower-cased words of a text with punctuation and symbols dropped; Devanagari vowel signs are kept
+def tokenize(text):
+    text = unicodedata.normalize('NFC', text.lower())
+    text = "".join(" " if unicodedata.category(ch)[0] in 'PSZC' else ch for ch in text)
+    return text.split()
+
+# Figures mentioned in a text (Devanagari digits read as ASCII); copies of one announcement share them,
+# while "20% dividend" and "25% dividend" are different stories however similar the text
+def numbers(text):
+    return tuple(sorted({"".join(str(unicodedata.decimal(ch)) if ch.isdecimal() else ch for ch in match)
+                         for match in re.findall(r'\d+(?:\.\d+)?', text)}))
+
+def shingles(text):
+    text = " ".join(tokenize(text))
+    return frozenset(text[i:i + SHINGLE_SIZE] for i in range(max(1, len(text) - SHINGLE_SIZE + 1)))
+
+def _feature_hash(feature):
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+
+# 64-bit SimHash of a shingle set: texts sharing most shingles differ in few bits
+def simhash(features):
+    if not features:
+        return 0
+    hashes = np.array([_feature_hash(feature) for feature in features], dtype=np.uint64)
+    bits = (hashes[:, None] >> _BIT_SHIFTS) & np.uint64(1)
+    # A bit is set when more than half of the features have it set
+    majority = bits.sum(axis=0) * 2 > len(hashes)
+    return int(np.packbits(majority[::-1]).view('>u8')[0])
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+# Near-duplicate clusters of articles
+# Each article is filed under its SimHash blocks within a scope (matched company and figures), so a
+# lookup only verifies the few articles of the same scope sharing a block, by Jaccard similarity of the
+# shingle sets, instead of comparing against every article seen.
+class SimHashIndex:
+    def __init__(self, max_distance=MAX_DISTANCE, min_similarity=MIN_SIMILARITY):
+        self.max_distance = max_distance
+        self.min_similarity = min_similarity
+        self.buckets = {}
+        self.ids = set()
+
+    def _keys(self, scope, fingerprint):
+        return [(scope, i, (fingerprint >> lo) & ((1 << (hi - lo)) - 1)) for i, (lo, hi) in enumerate(_BLOCK_BOUNDS)]
+
+    # Cluster id of the most similar near-duplicate already indexed, None if there is none
+    def find(self, scope, fingerprint, features):
+        best, best_similarity = None, self.min_similarity
+        for key in self._keys(scope, fingerprint):
+            for other, other_features, cluster_id in self.buckets.get(key, ()):
+                if hamming(fingerprint, other) > self.max_distance:
+                    continue
+                similarity = jaccard(features, other_features)
+                if similarity >= best_similarity:
+                    best, best_similarity = cluster_id, similarity
+        return best
+
+    def add(self, scope, fingerprint, features, cluster_id):
+        for key in self._keys(scope, fingerprint):
+            self.buckets.setdefault(key, []).append((fingerprint, features, cluster_id))
+
+    # Cluster of an article: its near-duplicate's cluster, or a new cluster named after the article.
+    # With a cluster_id the article is filed under that cluster as it is.
+    def assign(self, article_id, company, title, summary, cluster_id=None):
+        text = item_text(title, summary)
+        scope = (company, numbers(text))
+        features = shingles(text)
+        fingerprint = simhash(features)
+        if cluster_id is None:
+            cluster_id = self.find(scope, fingerprint, features) or str(article_id)
+        self.add(scope, fingerprint, features, cluster_id)
+        self.ids.add(article_id)
+        return cluster_id
+
+# Index of stored articles (articleId, matchedCompany, title, summary, clusterId) that have a cluster;
+# articles already in the given index are not added again
+def index_from_frame(df, index=None):
+    index = index or SimHashIndex()
+    if 'clusterId' not in df.columns:
+        return index
+    stored = df[df['clusterId'].notna() & ~df['articleId'].isin(index.ids)]
+    for article_id, company, title, summary, cluster_id in zip(stored['articleId'], stored['matchedCompany'],
+                                                               stored['title'], stored['summary'], stored['clusterId']):
+        index.assign(article_id, company, title, summary, cluster_id)
+    return index
+
+# Start of the publishedDate window new articles are matched against
+def recent_start(days=RECENT_DAYS):
+    return pd.Timestamp.now(tz='UTC') - pd.Timedelta(days=days)
+
+# Index of the stored news published in the last `days` days
+def recent_index(days=RECENT_DAYS, root=None):
+    news = storage.read("news", start=recent_start(days), columns=['articleId', 'matchedCompany', 'title', 'summary', 'clusterId'], root=root)
+    index = index_from_frame(news)
+    logger.info(f"Indexed {len(index.ids)} articles of the last {days} days for near-duplicate matching")
+    return index
+
+# Set clusterId on classified news items (dicts), oldest first so a cluster is named after its first article
+def cluster_items(items, index):
+    for item in sorted(items, key=lambda item: str(item.get('publishedDate', ''))):
+        item['clusterId'] = index.assign(item.get('articleId'), item.get('matchedCompany'), item.get('title'), item.get('summary'))
+    return items
+
+# clusterId of every row of a news frame: stored ids are kept, rows without one are matched against the
+# stored clusters (the frame's own, plus those of the given index) and each other
+def assign_clusters(df, index=None):
+    index = index_from_frame(df, index)
+    clusters = df['clusterId'].astype(object) if 'clusterId' in df.columns else pd.Series(None, index=df.index, dtype=object)
+    missing = df[clusters.isna()].sort_values('publishedDate', kind='stable')
+    for i, article_id, company, title, summary in zip(missing.index, missing['articleId'], missing['matchedCompany'],
+                                                      missing['title'], missing['summary']):
+        clusters.at[i] = index.assign(article_id, company, title, summary)
+    logger.info(f"{len(df)} articles fall into {clusters.nunique()} near-duplicate clusters")
+    return clusters
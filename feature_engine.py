@@ -0,0 +1,98 @@
+import numpy as np
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Default feature family; each entry is a tuple of rolling windows in trading days
+DEFAULT_MA_WINDOWS = (5, 10, 20)
+DEFAULT_VOLATILITY_WINDOWS = (5, 20)
+
+# Rolling mean over the last `window` values, NaN until the window is full
+# Uses a cumulative sum when the series is clean and a strided window view when it contains NaN,
+# so a single missing price only blanks the windows that actually include it
+def rolling_mean(values, window, out=None):
+    n = len(values)
+    if out is None:
+        out = np.empty(n)
+    out[:min(window - 1, n)] = np.nan
+    if n < window:
+        return out
+    if np.isnan(values).any():
+        out[window - 1:] = np.lib.stride_tricks.sliding_window_view(values, window).mean(axis=1)
+        return out
+    cumulative = np.cumsum(values)
+    out[window - 1] = cumulative[window - 1]
+    np.subtract(cumulative[window:], cumulative[:-window], out=out[window:])
+    out[window - 1:] /= window
+    return out
+
+# Simple return (pct_change) of a price series, NaN on the first row
+def simple_return(values, out=None):
+    if out is None:
+        out = np.empty(len(values))
+    out[:1] = np.nan
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.divide(values[1:], values[:-1], out=out[1:])
+    out[1:] -= 1.0
+    return out
+
+# Rolling sample standard deviation (ddof=1) over the last `window` values, NaN until the window is full
+def rolling_std(values, window, out=None):
+    n = len(values)
+    if out is None:
+        out = np.empty(n)
+    out[:min(window - 1, n)] = np.nan
+    if n >= window:
+        out[window - 1:] = np.lib.stride_tricks.sliding_window_view(values, window).std(axis=1, ddof=1)
+    return out
+
+# Names of the features produced for a given configuration, in matrix row order
+def feature_columns(ma_windows=DEFAULT_MA_WINDOWS, volatility_windows=DEFAULT_VOLATILITY_WINDOWS, has_volume=False):
+    columns = ['open', 'close', 'ret_open', 'ret_close']
+    columns += [f"ma_{price}_{w}" for w in ma_windows for price in ('open', 'close')]
+    columns += [f"vol_close_{w}" for w in volatility_windows]
+    if has_volume:
+        columns += ['volume'] + [f"ma_volume_{w}" for w in ma_windows]
+    return columns
+
+# Compute the whole feature family in one pass over contiguous float arrays
+# Returns {'columns': [...], 'values': (features, rows) float64 matrix}; undefined cells are NaN.
+# Every feature is written straight into its row of a single preallocated matrix.
+def compute_features(open_prices, close_prices, volume=None, ma_windows=DEFAULT_MA_WINDOWS,
+                     volatility_windows=DEFAULT_VOLATILITY_WINDOWS):
+    open_prices = np.ascontiguousarray(open_prices, dtype=float)
+    close_prices = np.ascontiguousarray(close_prices, dtype=float)
+    has_volume = volume is not None
+    columns = feature_columns(ma_windows, volatility_windows, has_volume)
+    row = {name: i for i, name in enumerate(columns)}
+    values = np.empty((len(columns), len(close_prices)))
+
+    values[row['open']] = open_prices
+    values[row['close']] = close_prices
+    simple_return(open_prices, out=values[row['ret_open']])
+    simple_return(close_prices, out=values[row['ret_close']])
+    for w in ma_windows:
+        rolling_mean(open_prices, w, out=values[row[f"ma_open_{w}"]])
+        rolling_mean(close_prices, w, out=values[row[f"ma_close_{w}"]])
+    for w in volatility_windows:
+        rolling_std(values[row['ret_close']], w, out=values[row[f"vol_close_{w}"]])
+    if has_volume:
+        volume = np.ascontiguousarray(volume, dtype=float)
+        values[row['volume']] = volume
+        for w in ma_windows:
+            rolling_mean(volume, w, out=values[row[f"ma_volume_{w}"]])
+
+    return {'columns': columns, 'values': values}
+
+# Compute features straight from a candle DataFrame as returned by fetch_historical_data
+def compute_frame_features(df, ma_windows=DEFAULT_MA_WINDOWS, volatility_windows=DEFAULT_VOLATILITY_WINDOWS):
+    volume = df['Volume'].to_numpy(dtype=float) if 'Volume' in df.columns else None
+    return compute_features(df['Open Price'].to_numpy(dtype=float), df['Close Price'].to_numpy(dtype=float),
+                            volume=volume, ma_windows=ma_windows, volatility_windows=volatility_windows)
+
+# Select named feature rows from a feature matrix
+def select_features(features, names):
+    row = {name: i for i, name in enumerate(features['columns'])}
+    return features['values'][[row[name] for name in names]]
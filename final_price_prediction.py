@@ -7,22 +7,35 @@ import logging
 import requests
 from datetime import datetime, timedelta
 from urllib.parse import urlparse
-
-# Set up logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+from prediction_store import read_latest, write_predictions
+from metrics import track_stage, record_rows
+import profiling
+from logging_setup import setup_logging, ItemLog
+from sentiment_store import sentiment_store_exists, latest_sentiment_frame
+
+# Set up logging through the shared logging queue
+setup_logging()
 logger = logging.getLogger(__name__)
+# Per-price adjustments of adjust_with_sentiment are rate-limited DEBUG lines with a periodic summary by outcome
+adjustment_log = ItemLog(logger, "Sentiment adjustments")
+
+# Reduce prediction rows to the newest one per symbol, indexed by symbol
+def latest_per_symbol(df):
+    return df.drop_duplicates('symbol', keep='last').set_index('symbol')
 
-# Load historical predictions
+# Load the latest historical prediction per symbol, indexed by symbol, from the latest snapshot of a
+# prediction dataset or from a legacy append-only CSV file
 def load_historical_predictions(file_path):
     try:
         if os.path.exists(file_path):
-            df = pd.read_csv(file_path)
+            df = pd.read_csv(file_path) if file_path.endswith('.csv') else read_latest(file_path)
             required_cols = ['symbol', 'predicted_open', 'predicted_close', 'predicted_average', 'confidence']
             if not all(col in df.columns for col in required_cols):
                 logger.error(f"Missing columns in {file_path}: {required_cols}")
                 return pd.DataFrame()
-            logger.info(f"Loaded historical predictions from {file_path} with {len(df)} entries")
-            return df
+            latest = latest_per_symbol(df)
+            logger.info(f"Loaded historical predictions from {file_path} with {len(df)} entries for {len(latest)} symbols")
+            return latest
         logger.warning(f"Historical prediction file {file_path} not found")
         return pd.DataFrame()
     except Exception as e:
@@ -72,110 +85,124 @@ def adjust_with_sentiment(historical_price, sentiment_df, weightage):
     if sentiment_df is not None and not sentiment_df.empty:
         latest_sentiment = sentiment_df.iloc[-1]
         sentiment_score = latest_sentiment['sentiment_score']
-        logger.info(f"Sentiment score for adjustment: {sentiment_score}")
         if sentiment_score == 0:
-            logger.warning("Sentiment score is zero, no adjustment applied")
+            adjustment_log.record("zero score", "Sentiment score is zero, no adjustment applied")
             return historical_price, 0.0
 
         media_domain = urlparse(latest_sentiment['mediaUrl']).netloc
         media_weight = weightage.get(media_domain, {}).get('average_weight', 0.5)
-        logger.info(f"Media weight for {media_domain}: {media_weight}")
         if media_weight == 0:
-            logger.warning(f"Media weight is zero for {media_domain}, no adjustment applied")
+            adjustment_log.record("zero media weight", "Media weight is zero for %s, no adjustment applied", media_domain)
             return historical_price, 0.0
 
         sentiment_impact = sentiment_score * media_weight
-        logger.info(f"Sentiment impact: {sentiment_impact}")
         adjusted_price = historical_price * (1 + sentiment_impact * 0.5)  # Increased impact factor to 0.5
         confidence = min(1.0, media_weight * abs(sentiment_score))
-        logger.info(f"Adjusted {historical_price:.2f} to {adjusted_price:.2f} with confidence {confidence}")
+        adjustment_log.record("adjusted", "Adjusted %.2f to %.2f (score %s, media weight for %s %s, impact %s) with confidence %s",
+                              historical_price, adjusted_price, sentiment_score, media_domain, media_weight, sentiment_impact, confidence)
         return adjusted_price, confidence
     else:
         return historical_price, 0.0
 
+# Adjust the latest predictions of every symbol with sentiment in a handful of array operations
+# historical_df holds the latest predictions indexed by symbol; sentiment_df holds each symbol's latest
+# sentiment rows (already filtered to its articles) with a symbol column. Gives the same result as
+# calling adjust_with_sentiment on open, close and average for each symbol, which stays the reference.
+def adjust_universe_with_sentiment(historical_df, sentiment_df, weightage):
+    symbols = historical_df.index
+    score = np.full(len(symbols), np.nan)
+    weight = np.full(len(symbols), np.nan)
+    if sentiment_df is not None and not sentiment_df.empty:
+        # adjust_with_sentiment uses the last sentiment row of each symbol
+        latest = sentiment_df.drop_duplicates('symbol', keep='last').set_index('symbol').reindex(symbols)
+        score = latest['sentiment_score'].to_numpy(dtype=float)
+        domains = latest['mediaUrl'].map(lambda url: urlparse(url).netloc if isinstance(url, str) else None)
+        domain_weights = {domain: weightage.get(domain, {}).get('average_weight', 0.5) for domain in domains.dropna().unique()}
+        weight = domains.map(domain_weights).to_numpy(dtype=float)
+
+    # No sentiment, a zero score or a zero media weight leaves the price untouched with zero confidence
+    active = ~np.isnan(score) & ~np.isnan(weight) & (score != 0) & (weight != 0)
+    sentiment_impact = np.where(active, score * weight, 0.0)
+    factor = 1 + sentiment_impact * 0.5  # Increased impact factor to 0.5
+    confidence = np.where(active, np.minimum(1.0, weight * np.abs(score)), 0.0)
+
+    historical = historical_df[['predicted_open', 'predicted_close', 'predicted_average']].to_numpy(dtype=float)
+    final = historical * factor[:, None]
+    return pd.DataFrame({
+        'historical_open': historical[:, 0],
+        'final_open': final[:, 0],
+        'historical_close': historical[:, 1],
+        'final_close': final[:, 1],
+        'historical_average': historical[:, 2],
+        'final_average': final[:, 2],
+        'confidence': confidence
+    }, index=symbols)
+
+# Latest sentiment rows for the given symbols from the per-symbol CSV files, in the store's layout
+def load_sentiment_files(sentiment_dir, symbols):
+    frames = []
+    for symbol in symbols:
+        # Load sentiment data, skip if not found
+        sentiment_df = load_sentiment_data(sentiment_dir, symbol)
+        if sentiment_df is None or sentiment_df.empty:
+            continue
+        # Ensure articleId is string for .str.contains
+        sentiment_df['articleId'] = sentiment_df['articleId'].astype(str)
+        frames.append(sentiment_df[sentiment_df['articleId'].str.contains(symbol, na=False)].assign(symbol=symbol))
+    return pd.concat(frames, ignore_index=True) if frames else None
+
+# Latest sentiment for every symbol in one read of the sentiment store, already filtered to the
+# articles that mention the symbol; per-symbol CSV files are only used when no store exists yet
+def load_latest_sentiment(sentiment_dir, symbols):
+    if sentiment_store_exists():
+        return latest_sentiment_frame()
+    return load_sentiment_files(sentiment_dir, symbols)
+
 # Main prediction function
-def predict_final_price(sentiment_dir, weightage_file, historical_file, output_file):
-    weightage = load_media_weightage(weightage_file)
-    historical_df = load_historical_predictions(historical_file)
+# weightage, historical_df (latest predictions indexed by symbol) and sentiment_df (latest sentiment rows)
+# can be handed over in memory by an in-process caller; anything not given is loaded from disk
+@track_stage("final")
+def predict_final_price(sentiment_dir, weightage_file, historical_file, output_dir,
+                        weightage=None, historical_df=None, sentiment_df=None):
+    if weightage is None:
+        weightage = load_media_weightage(weightage_file)
+    if historical_df is None:
+        historical_df = load_historical_predictions(historical_file)
 
     if historical_df.empty:
         logger.error("Insufficient historical data for prediction")
         return {}
 
-    # Get unique symbols from historical data
-    symbols = historical_df['symbol'].unique()
-    all_predictions = []
+    if sentiment_df is None:
+        sentiment_df = load_latest_sentiment(sentiment_dir, historical_df.index)
 
-    for symbol in symbols:
-        # Load sentiment data, return None if not found
-        sentiment_df = load_sentiment_data(sentiment_dir, symbol)
-
-        # Filter historical prediction for the specific symbol
-        historical_pred = historical_df[historical_df['symbol'] == symbol].iloc[-1] if not historical_df.empty else None
-        if historical_pred is None:
-            logger.warning(f"No historical prediction found for {symbol}")
-            continue
-
-        # Extract historical prices
-        historical_open = historical_pred['predicted_open']
-        historical_close = historical_pred['predicted_close']
-        historical_average = historical_pred['predicted_average']
-        confidence = historical_pred['confidence']
-
-        # Ensure articleId is string for .str.contains
-        if sentiment_df is not None and not sentiment_df.empty:
-            sentiment_df['articleId'] = sentiment_df['articleId'].astype(str)
-
-        # Adjust each price type with sentiment, or use historical if no sentiment
-        final_open, open_confidence = adjust_with_sentiment(historical_open, sentiment_df[sentiment_df['articleId'].str.contains(symbol, na=False)] if sentiment_df is not None else None, weightage)
-        final_close, close_confidence = adjust_with_sentiment(historical_close, sentiment_df[sentiment_df['articleId'].str.contains(symbol, na=False)] if sentiment_df is not None else None, weightage)
-        final_average, avg_confidence = adjust_with_sentiment(historical_average, sentiment_df[sentiment_df['articleId'].str.contains(symbol, na=False)] if sentiment_df is not None else None, weightage)
-
-        if final_open is None or final_close is None or final_average is None:
-            final_open = historical_open
-            final_close = historical_close
-            final_average = historical_average
-            open_confidence = confidence
-            close_confidence = confidence
-            avg_confidence = confidence
-            logger.warning(f"No valid sentiment adjustment for {symbol}, using historical prices")
-
-        all_predictions.append({
-            'symbol': symbol,
-            'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'historical_open': historical_open,
-            'final_open': final_open,
-            'historical_close': historical_close,
-            'final_close': final_close,
-            'historical_average': historical_average,
-            'final_average': final_average,
-            'confidence': max(open_confidence, close_confidence, avg_confidence)  # Use max confidence
-        })
-        logger.info(f"{symbol}: Historical Open = {historical_open:.2f}, Final Open = {final_open:.2f}, "
-                    f"Historical Close = {historical_close:.2f}, Final Close = {final_close:.2f}, "
-                    f"Historical Average = {historical_average:.2f}, Final Average = {final_average:.2f}, "
-                    f"Confidence = {max(open_confidence, close_confidence, avg_confidence):.2f}")
-
-    if not all_predictions:
+    # Adjust open, close and average of the whole universe at once
+    final_df = adjust_universe_with_sentiment(historical_df, sentiment_df, weightage)
+    record_rows(rows_in=len(historical_df), rows_out=len(final_df))
+    if final_df.empty:
         logger.error("No valid predictions generated")
         return {}
-
-    pred_df = pd.DataFrame(all_predictions)
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    pred_df.to_csv(output_file, index=False, mode='a', header=not os.path.exists(output_file))
-    logger.info(f"Saved final predictions to {output_file} with {len(pred_df)} entries at 06:27 PM +0545 on July 29, 2025")
-
-    return {pred['symbol']: {
-        'final_open': pred['final_open'],
-        'final_close': pred['final_close'],
-        'final_average': pred['final_average'],
-        'confidence': pred['confidence']
-    } for pred in all_predictions}
+    if logger.isEnabledFor(logging.DEBUG):
+        for symbol, pred in final_df.iterrows():
+            logger.debug("%s: Historical Open = %.2f, Final Open = %.2f, Historical Close = %.2f, Final Close = %.2f, "
+                         "Historical Average = %.2f, Final Average = %.2f, Confidence = %.2f", symbol,
+                         pred['historical_open'], pred['final_open'], pred['historical_close'], pred['final_close'],
+                         pred['historical_average'], pred['final_average'], pred['confidence'])
+    adjusted = int((final_df['confidence'] > 0).sum())
+    logger.info(f"Adjusted {adjusted} of {len(final_df)} predictions with sentiment")
+
+    pred_df = final_df.rename_axis('symbol').reset_index()
+    pred_df.insert(1, 'date', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    write_predictions(pred_df, output_dir)
+    logger.info(f"Saved final predictions to {output_dir} with {len(pred_df)} entries at 06:27 PM +0545 on July 29, 2025")
+
+    return final_df[['final_open', 'final_close', 'final_average', 'confidence']].to_dict('index')
 
 if __name__ == "__main__":
+    profiling.enable_from_args()  # --profile[=cpu|memory] writes a CPU and memory profile of the run
     sentiment_dir = r"E:\hey\output\sentiment_results"
     weightage_file = r"E:\hey\output\weightage\media_weightage.json"
-    historical_file = r"E:\hey\output\history prediction\history_price_prediction.csv"
-    output_file = r"E:\hey\output\prediction_with_news\final_prediction\share_prediction.csv"
+    historical_file = r"E:\hey\output\history prediction\history_price_prediction"
+    output_dir = r"E:\hey\output\prediction_with_news\final_prediction\share_prediction"
     logger.info("Starting final price prediction analysis")
-    predictions = predict_final_price(sentiment_dir, weightage_file, historical_file, output_file)
\ No newline at end of file
+    predictions = predict_final_price(sentiment_dir, weightage_file, historical_file, output_dir)
\ No newline at end of file
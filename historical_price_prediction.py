@@ -1,27 +1,72 @@
 import pandas as pd
 import numpy as np
-from sklearn.linear_model import LinearRegression
 import logging
-import requests
+import json
 from datetime import datetime, timedelta
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from feature_engine import compute_features, select_features
+from prediction_store import write_predictions
+from metrics import track_stage, record_rows
+import profiling
+from sharehub_client import get_client, CANDLE_PATH
+from price_matrix import PriceMatrix
+from regression_state import new_model_state, apply_candles, predict_from_state, load_model_states, save_model_states
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# API endpoint for candle chart data
-API_URL = "https://sharehubnepal.com/data/api/v1/candle-chart/history"
+# Candle history is cached for an hour so re-runs within a session do not refetch it
+CANDLE_TTL = 60 * 60
 
-# Fetch all available historical candle data from API
-def fetch_historical_data(symbol):
+# Symbols covered by the historical prediction stage
+SYMBOLS = ["NABIL", "NIMB", "EBL", "NICA", "MBL", "SHL", "TRH", "OHL", "NHPC", "BPCL",
+        "CHCL", "STC", "BBC", "NUBL", "SANIMA", "NABBC", "NICL", "UAIL", "NIL", "IGI",
+        "NLIC", "SICL", "UNL", "BFC", "GFCL", "NMB", "PRVU", "GMFIL", "SWBBL", "EDBL",
+        "PCBL", "LBBL", "AHPC", "ALICL", "SJLIC", "GBBL", "JBBL", "CORBL", "SADBL", "SHINE",
+        "FMDBL", "GBIMEP", "MFIL", "NBL", "NLG", "SKBBL", "RLFL", "RBCLPO", "BARUN", "VLBS",
+        "HLBSL", "API", "HEIP", "GILB", "MERO", "HIDCL", "NMFBS", "RSDC", "AKPL", "UMHL",
+        "SMATA", "CHL", "HPPL", "MSLB", "SEF", "SMB", "RADHI", "WNLB", "NADEP", "PMHPL",
+        "KPCL", "AKJCL", "ALBSL", "GMFBS", "HURJA", "GLBSL", "UNHPL", "ILBS", "NBF2", "RHPL",
+        "SIGS2", "SAPDBL", "CMF2", "NICBF", "SCB", "HBL", "SBI", "LSL", "KBL",
+        "SBL", "CBBL", "DDBL", "RBCL", "NLICL", "HEI", "SPIL", "PRIN", "SALICO", "LICN",
+        "NFS", "BNL", "GUFL", "CIT", "BNT", "HDL", "PFL", "SIFC", "CFCL", "JFL",
+        "SFCL", "ICFC", "NTC", "MBLD2085", "NMB50", "NICAD8283", "SFMF", "SRBLD83", "LBLD86", "HDHPC",
+        "GWFD83", "ADBLD83", "NICLBSL", "NBLD82", "SMPDA", "LUK", "LEC", "SSHL", "SGIC", "UMRH",
+        "CGH", "NIBD84", "KEF", "SHEL", "CHDC", "PSF", "KSBBLD87", "JBLB", "NBLD87", "SAMAJ",
+        "NICSF", "PROFL", "GBIME", "CZBIL", "MDB", "HLI", "NMLBBL", "ADBL", "MLBL", "KSBBL",
+        "NIMBPO", "MPFL", "MNBBL", "SLBBL", "SINDU", "GBLBS", "SHPC", "KMCDB", "MLBBL", "RIDI",
+        "LLBS", "MLBLPO", "MATRI", "JSLBB", "NMBMF", "SWMF", "NGPL", "GRDBL", "KKHC", "MND84/85",
+        "MLBS", "MBJC", "GBBD85", "ULBSL", "CYCL", "RFPL", "DORDI", "KDBY", "PBD88", "SGHC",
+        "MHL", "USHEC", "DLBS", "BHPL", "SPL", "SMH", "MKHC", "SFEF", "MHCL", "ANLB",
+        "MAKAR", "MKHL", "DOLTI", "CITY", "PRSF", "MCHL", "SCBD", "RMF2", "MEL", "RAWA",
+        "SIGS3", "NRM", "C30MF", "GCIL", "TSHL", "KBSH", "LBBLD89", "LVF2", "MEHL", "ULHC",
+        "CLI", "MANDU", "HATHY", "BGWT", "SONA", "TVCL", "H8020", "VLUCL", "CKHL", "NWCL",
+        "NICGF2", "KSY", "SARBTM", "NIBLSTF", "MNMF1", "GMLI", "GSY", "NMIC", "CREST", "MBLEF",
+        "PURE", "SANVI", "DHPL", "FOWAD", "SPDL", "NHDL", "USLB", "JOSHI", "ACLBSL", "UPPER",
+        "SLBSL", "GHL", "SHIVM", "UPCL", "MHNL", "PPCL", "SAND2085", "SMFBS", "SJCL", "NRIC",
+        "SBIBD86", "NRN", "MEN", "PMLI", "NIFRA", "SLCF", "GLH", "MLBSL", "MFLD85", "RURU",
+        "NCCD86", "SBCF", "NIBSF2", "RMF1", "SRLI", "PBD85", "MBLD87", "MKJC", "JBBD87", "SAHAS",
+        "TPC", "MMF1", "NBF3", "SPC", "NYADI", "NBLD85", "BNHC", "ENL", "NESDO", "EBLD86",
+        "GVL", "BHL", "CCBD88", "NICFC", "BHDC", "HHL", "UHEWA", "GIBF1", "RHGCL", "SBID83",
+        "PBD84", "AVYAN", "EBLD85", "SPHL", "PPL", "NSIF2", "SIKLES", "KBLD89", "EHPL",
+        "SHLB", "PHCL", "NIBLGF", "SAGF", "UNLB", "SMHL", "AHL", "KDL", "EBLEB89", "TAMOR",
+        "SMJC", "BEDC", "IHL", "ILI", "USHL", "MLBLD89", "RNLI", "SNLI", "MSHL", "MMKJL",
+        "MKCL", "HRL", "ICFCD88", "NMBHF2", "EBLD91", "OMPL", "RSY", "NIFRAGED", "TTL"]
+
+# Fetch all available historical candle data from API, or only the latest `countback` candles
+# ttl=0 always revalidates a cached response (with its ETag) instead of trusting it for CANDLE_TTL
+def fetch_historical_data(symbol, countback=None, ttl=CANDLE_TTL):
     try:
         params = {
             "symbol": symbol,
             "resolution": "1D",
             "isAdjust": "true"
         }
-        response = requests.get(API_URL, params=params, timeout=10)
+        if countback:
+            params["countback"] = countback
+        response = get_client().get(CANDLE_PATH, params=params, ttl=ttl)
         if response.status_code == 200:
             data = response.json()
             if data.get("success") and data.get("data"):
@@ -29,7 +74,11 @@ def fetch_historical_data(symbol):
                 df['time'] = pd.to_datetime(df['time'], unit='ms')
                 df['Open Price'] = df['open']
                 df['Close Price'] = df['close']
-                df = df[['time', 'Open Price', 'Close Price']].rename(columns={'time': 'publishDate'})
+                columns = ['time', 'Open Price', 'Close Price']
+                if 'volume' in df.columns:
+                    df['Volume'] = df['volume']
+                    columns.append('Volume')
+                df = df[columns].rename(columns={'time': 'publishDate'})
                 logger.info(f"Fetched {len(df)} days of data for {symbol}")
                 return df
             logger.error(f"API success=false or no data for {symbol}: {data}")
@@ -40,144 +89,300 @@ def fetch_historical_data(symbol):
         logger.error(f"Error fetching data for {symbol}: {e}")
         return None
 
-# Calculate moving average for price trend
-def calculate_moving_average(df, window=5):
-    df['ma_open'] = df['Open Price'].rolling(window=window).mean()
-    df['ma_close'] = df['Close Price'].rolling(window=window).mean()
-    return df
+# Candles for a symbol from a mapped price matrix when one is given, otherwise from the API
+def load_candles(symbol, countback=None, matrix=None, ttl=CANDLE_TTL):
+    if matrix is not None:
+        return matrix.frame(symbol, countback)
+    return fetch_historical_data(symbol, countback, ttl=ttl)
+
+# Compute the model's features for one symbol over its whole history
+# Returns (2, rows) arrays of MA, price and price change for the rows that survive NaN filtering,
+# row 0 being open and row 1 close, or None when there is not enough history
+def compute_model_features(df, window=5):
+    if df is None or df.empty or len(df) < window + 1:  # Use window + 1 for shift
+        return None
+
+    # Moving average and price change straight from the price arrays, without intermediate DataFrames
+    features = compute_features(df['Open Price'].to_numpy(dtype=float), df['Close Price'].to_numpy(dtype=float),
+                                ma_windows=(window,), volatility_windows=())
+    ma = select_features(features, [f"ma_open_{window}", f"ma_close_{window}"])
+    prices = select_features(features, ['open', 'close'])
+    changes = select_features(features, ['ret_open', 'ret_close'])
+
+    # Keep only rows where every input is defined, ensuring consistent samples
+    valid = ~(np.isnan(ma).any(axis=0) | np.isnan(prices).any(axis=0) | np.isnan(changes).any(axis=0))
+    valid &= df['publishDate'].notna().to_numpy()
+    if valid.sum() < 2:  # Need at least 2 samples for prediction
+        return None
+    return ma[:, valid], prices[:, valid], changes[:, valid]
+
+# Build regression inputs for one symbol: MA features (x), next-day prices (y), last MA and recent changes
+# Row 0 of each array is the open model, row 1 the close model
+def prepare_regression_inputs(df, window=5):
+    features = compute_model_features(df, window=window)
+    if features is None:
+        return None
+    ma, prices, changes = features
+    return {
+        'x': ma[:, :-1],            # Features: MA of day t
+        'y': prices[:, 1:],         # Targets: price of day t + 1
+        'last_x': ma[:, -1],        # Latest MA, used for the prediction
+        'changes': changes[:, -5:]  # Last 5 price changes, used for confidence
+    }
+
+# Fit closed-form single-feature OLS for many ragged series at once
+# x and y have shape (targets, total samples) with the series of each symbol concatenated;
+# lengths holds the number of samples per symbol. Returns slope and intercept of shape (targets, symbols).
+def fit_batched_regression(x, y, lengths):
+    lengths = np.asarray(lengths, dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    segments = np.repeat(np.arange(len(lengths)), lengths)
+    n = lengths.astype(float)
+
+    mean_x = np.add.reduceat(x, offsets, axis=1) / n
+    mean_y = np.add.reduceat(y, offsets, axis=1) / n
+    dx = x - mean_x[:, segments]
+    dy = y - mean_y[:, segments]
+    sxx = np.add.reduceat(dx * dx, offsets, axis=1)
+    sxy = np.add.reduceat(dx * dy, offsets, axis=1)
+
+    # A constant feature has no usable slope; fall back to the mean target like a least-squares solver would
+    scale = np.add.reduceat(x * x, offsets, axis=1)
+    slope = np.divide(sxy, sxx, out=np.zeros_like(sxy), where=sxx > np.finfo(float).eps * scale)
+    intercept = mean_y - slope * mean_x
+    return slope, intercept
+
+# Confidence based on recent trend stability, for a (symbols, targets, k) array of NaN-padded changes
+def batched_confidence(changes):
+    valid = ~np.isnan(changes)
+    count = valid.sum(axis=2)
+    filled = np.where(valid, changes, 0.0)
+    mean = filled.sum(axis=2) / np.maximum(count, 1)
+    sq = np.where(valid, (changes - mean[:, :, None]) ** 2, 0.0).sum(axis=2)
+    with np.errstate(invalid='ignore'):
+        std = np.where(count > 1, sq / np.maximum(count - 1, 1), np.nan) ** 0.5
+        confidence = np.clip(1.0 - std.mean(axis=1), 0.0, 1.0)  # Average stability
+    return np.where(np.isnan(confidence), 1.0, confidence)
+
+# Predict open, close, average and confidence for a list of prepared regression inputs in one batch
+def predict_from_inputs(inputs):
+    if not inputs:
+        return []
+    lengths = [item['x'].shape[1] for item in inputs]
+    x = np.concatenate([item['x'] for item in inputs], axis=1)
+    y = np.concatenate([item['y'] for item in inputs], axis=1)
+    slope, intercept = fit_batched_regression(x, y, lengths)
+
+    last_x = np.stack([item['last_x'] for item in inputs], axis=1)
+    predicted = intercept + slope * last_x  # (2, symbols)
+
+    k = max(item['changes'].shape[1] for item in inputs)
+    changes = np.full((len(inputs), 2, k), np.nan)
+    for i, item in enumerate(inputs):
+        changes[i, :, :item['changes'].shape[1]] = item['changes']
+    confidence = batched_confidence(changes)
+
+    return [(float(predicted[0, i]), float(predicted[1, i]),
+             float((predicted[0, i] + predicted[1, i]) / 2), float(confidence[i]))
+            for i in range(len(inputs))]
+
+# Predict open/close prices for every symbol at once from a {symbol: DataFrame} mapping
+def batch_predict_historical_prices(frames):
+    prepared = {}
+    for symbol, df in frames.items():
+        inputs = prepare_regression_inputs(df)
+        if inputs is None:
+            logger.warning(f"Not enough history to fit a model for {symbol}")
+            continue
+        prepared[symbol] = inputs
+    results = predict_from_inputs(list(prepared.values()))
+    return dict(zip(prepared.keys(), results))
 
 # Predict open and close prices based on historical pattern
 def predict_historical_price(df):
-    if df.empty or len(df) < 5 + 1:  # Use 5 as default window + 1 for shift
+    inputs = prepare_regression_inputs(df)
+    if inputs is None:
         return None, None, None, 0.0
+    return predict_from_inputs([inputs])[0]
 
-    # Calculate moving average and price change
-    df = calculate_moving_average(df, window=5)
-    df['open_change'] = df['Open Price'].pct_change()
-    df['close_change'] = df['Close Price'].pct_change()
+# Turn a candle DataFrame into (unix ms, open, close) tuples for the online model
+def candles_from_frame(df):
+    times = (df['publishDate'].astype('datetime64[ms]').astype('int64')).tolist()
+    return zip(times, df['Open Price'].tolist(), df['Close Price'].tolist())
 
-    # Prepare data for linear regression, ensuring consistent samples
-    df = df.dropna()  # Remove rows with NaN (after moving average)
-    if len(df) < 2:  # Need at least 2 samples for prediction
-        return None, None, None, 0.0
+# Bring a symbol's persisted regression state up to date with the candles published since it was saved
+# A missing state, or one built with another window or decay, is rebuilt from the full history once
+def refresh_model_state(symbol, state, window=5, decay=1.0, matrix=None):
+    if state is None or state['window'] != window or state['decay'] != decay:
+        df = load_candles(symbol, matrix=matrix)
+        if df is None or df.empty:
+            return None
+        return apply_candles(new_model_state(window, decay), candles_from_frame(df))
 
-    X_open = df['ma_open'].values.reshape(-1, 1)[:-1]  # Features for open, 2D array
-    y_open = df['Open Price'].shift(-1).values[:-1]    # Target for open
-    X_close = df['ma_close'].values.reshape(-1, 1)[:-1]  # Features for close, 2D array
-    y_close = df['Close Price'].shift(-1).values[:-1]  # Target for close
+    # Only request the days elapsed since the last applied candle
+    elapsed_days = (datetime.now() - datetime.fromtimestamp(state['last_time'] / 1000)).days
+    df = load_candles(symbol, countback=max(elapsed_days + 1, 2), matrix=matrix)
+    if df is None or df.empty:
+        return state
+    return apply_candles(state, candles_from_frame(df))
 
-    if len(X_open) != len(y_open) or len(X_close) != len(y_close) or X_open.shape[1] != 1 or X_close.shape[1] != 1:
-        logger.warning(f"Inconsistent samples or shape for {df['publishDate'].iloc[0]}: X_open={X_open.shape}, y_open={len(y_open)}, X_close={X_close.shape}, y_close={len(y_close)}")
-        return None, None, None, 0.0
+# Unix ms timestamp of the latest candle in a fetched DataFrame
+def latest_candle_time(df):
+    return int(df['publishDate'].astype('datetime64[ms]').astype('int64').iloc[-1])
 
-    # Predict open price
-    model_open = LinearRegression()
+# Load the manifest of the last candle each symbol's prediction was built from, with that prediction
+def load_prediction_manifest(manifest_file):
     try:
-        model_open.fit(X_open, y_open)
-        # Ensure correct 2D shape for prediction
-        last_ma_open = np.array([df['ma_open'].iloc[-1]]).reshape(1, 1)
-        if last_ma_open.shape != (1, 1):
-            logger.error(f"Invalid shape for last_ma_open: {last_ma_open.shape}")
-            return None, None, None, 0.0
-        predicted_open = model_open.predict(last_ma_open)[0]
+        if os.path.exists(manifest_file):
+            with open(manifest_file, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            logger.info(f"Loaded prediction manifest for {len(manifest)} symbols from {manifest_file}")
+            return manifest
+        logger.warning(f"Prediction manifest {manifest_file} not found, every symbol will be refit")
+        return {}
     except Exception as e:
-        logger.error(f"Error fitting open price model for {df['publishDate'].iloc[0]}: {e}")
-        return None, None, None, 0.0
+        logger.error(f"Error loading prediction manifest: {e}")
+        return {}
 
-    # Predict close price
-    model_close = LinearRegression()
-    try:
-        model_close.fit(X_close, y_close)
-        # Ensure correct 2D shape for prediction
-        last_ma_close = np.array([df['ma_close'].iloc[-1]]).reshape(1, 1)
-        if last_ma_close.shape != (1, 1):
-            logger.error(f"Invalid shape for last_ma_close: {last_ma_close.shape}")
-            return None, None, None, 0.0
-        predicted_close = model_close.predict(last_ma_close)[0]
-    except Exception as e:
-        logger.error(f"Error fitting close price model for {df['publishDate'].iloc[0]}: {e}")
-        return None, None, None, 0.0
+# Persist the prediction manifest atomically
+def save_prediction_manifest(manifest, manifest_file):
+    os.makedirs(os.path.dirname(manifest_file) or '.', exist_ok=True)
+    tmp_file = f"{manifest_file}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_file, manifest_file)
+    logger.info(f"Saved prediction manifest for {len(manifest)} symbols to {manifest_file}")
 
-    # Calculate average
-    predicted_average = (predicted_open + predicted_close) / 2
+# Fetch one symbol and prepare what the fit needs; runs inside a worker thread
+# Returns (status, payload, last_candle) where payload is the refreshed state (online mode) or the
+# regression inputs. A symbol whose latest candle matches its manifest entry comes back 'unchanged'
+# (still with its state in online mode, so a freshly rebuilt state is persisted).
+def fetch_and_prepare(symbol, states=None, manifest_entry=None, window=5, decay=1.0, matrix=None):
+    known_candle = manifest_entry.get('last_candle') if manifest_entry else None
+    if states is not None:
+        state = refresh_model_state(symbol, states.get(symbol), window=window, decay=decay, matrix=matrix)
+        if state is None:
+            return 'no_data', None, None
+        if known_candle is not None and state['last_time'] == known_candle:
+            return 'unchanged', state, known_candle
+        return 'ok', state, state['last_time']
 
-    # Confidence based on recent trend stability
-    recent_open_changes = df['open_change'].tail(5).std()
-    recent_close_changes = df['close_change'].tail(5).std()
-    confidence = max(0.0, min(1.0, 1.0 - (recent_open_changes + recent_close_changes) / 2))  # Average stability
+    # Probe only the latest candle before paying for the full history; the probe is always revalidated,
+    # as a cached one would hide a new candle for up to CANDLE_TTL
+    if known_candle is not None:
+        probe = load_candles(symbol, countback=1, matrix=matrix, ttl=0)
+        if probe is not None and not probe.empty and latest_candle_time(probe) == known_candle:
+            return 'unchanged', None, known_candle
 
-    return predicted_open, predicted_close, predicted_average, confidence
+    df = load_candles(symbol, matrix=matrix)
+    if df is None or df.empty:
+        return 'no_data', None, None
+    last_candle = latest_candle_time(df)
+    if known_candle is not None and last_candle == known_candle:
+        return 'unchanged', None, known_candle
+    inputs = prepare_regression_inputs(df, window=window)
+    if inputs is None:
+        return 'insufficient_history', None, last_candle
+    return 'ok', inputs, last_candle
 
 # Main prediction function
-def predict_historical_patterns(symbols, output_file):
+# With a state_file the models are updated online from persisted running statistics instead of refit;
+# decay < 1.0 down-weights older candles in that mode. Symbols are fetched by max_workers threads,
+# fitted together and written once, as a new partition of the output_dir prediction dataset.
+# With a manifest_file, symbols without a new candle since their last prediction are neither refit nor
+# re-appended; their previous prediction is carried forward in the returned dict.
+# With a price_matrix_dir candles are read from the memory-mapped universe matrix instead of the API.
+@track_stage("historical")
+def predict_historical_patterns(symbols, output_dir, state_file=None, decay=1.0, max_workers=1, manifest_file=None,
+                                price_matrix_dir=None):
     predictions = {}
-    os.makedirs(os.path.dirname(output_file) or os.path.dirname(os.path.dirname(output_file)), exist_ok=True)
-    for symbol in symbols:
-        df = fetch_historical_data(symbol)
-        if df is not None and not df.empty:
-            predicted_open, predicted_close, predicted_average, confidence = predict_historical_price(df)
-            if predicted_open is not None and predicted_close is not None:
-                predictions[symbol] = {
-                    'predicted_open': predicted_open,
-                    'predicted_close': predicted_close,
-                    'predicted_average': predicted_average,
-                    'confidence': confidence
-                }
-                pred_df = pd.DataFrame([{
-                    'symbol': symbol,
-                    'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    'predicted_open': predicted_open,
-                    'predicted_close': predicted_close,
-                    'predicted_average': predicted_average,
-                    'confidence': confidence
-                }])
-                # Save even if partial data is available
-                try:
-                    pred_df.to_csv(output_file, index=False, mode='a', header=not os.path.exists(output_file))
-                    logger.info(f"Predicted {symbol}: Open = {predicted_open:.2f}, Close = {predicted_close:.2f}, Average = {predicted_average:.2f}, Confidence = {confidence:.2f}")
-                except Exception as e:
-                    logger.error(f"Error saving prediction for {symbol}: {e}")
+    matrix = PriceMatrix.open_dir(price_matrix_dir) if price_matrix_dir else None
+    states = load_model_states(state_file) if state_file else None
+    manifest = load_prediction_manifest(manifest_file) if manifest_file else {}
+
+    # Fetch and prepare concurrently; a failing symbol never stops the others
+    prepared = {}
+    last_candles = {}
+    unchanged = []
+    failures = {'no_data': [], 'insufficient_history': [], 'error': []}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(fetch_and_prepare, symbol, states, manifest.get(symbol), decay=decay, matrix=matrix): symbol
+                   for symbol in symbols}
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                status, payload, last_candle = future.result()
+            except Exception as e:
+                logger.error(f"Error preparing {symbol}: {e}")
+                failures['error'].append(symbol)
+                continue
+            if status == 'ok':
+                prepared[symbol] = payload
+                last_candles[symbol] = last_candle
+            elif status == 'unchanged':
+                unchanged.append(symbol)
+                if states is not None:
+                    states[symbol] = payload
             else:
-                logger.warning(f"No valid prediction for {symbol}")
-        else:
-            logger.warning(f"No data fetched for symbol {symbol}")
+                failures[status].append(symbol)
+
+    # Carry forward predictions for symbols without a new candle
+    for symbol in unchanged:
+        predictions[symbol] = manifest[symbol]['prediction']
+
+    # Fit in the original symbol order
+    fitted_symbols = [symbol for symbol in symbols if symbol in prepared]
+    if states is not None:
+        results = {symbol: predict_from_state(prepared[symbol]) for symbol in fitted_symbols}
+        states.update(prepared)
+        save_model_states(states, state_file)
+    else:
+        results = dict(zip(fitted_symbols, predict_from_inputs([prepared[symbol] for symbol in fitted_symbols])))
+
+    run_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    rows = []
+    for symbol in fitted_symbols:
+        predicted_open, predicted_close, predicted_average, confidence = results[symbol]
+        if predicted_open is None or predicted_close is None:
+            failures['insufficient_history'].append(symbol)
+            continue
+        predictions[symbol] = {
+            'predicted_open': predicted_open,
+            'predicted_close': predicted_close,
+            'predicted_average': predicted_average,
+            'confidence': confidence
+        }
+        rows.append({'symbol': symbol, 'date': run_date, **predictions[symbol]})
+        manifest[symbol] = {'last_candle': last_candles[symbol], 'prediction': predictions[symbol]}
+        logger.info(f"Predicted {symbol}: Open = {predicted_open:.2f}, Close = {predicted_close:.2f}, Average = {predicted_average:.2f}, Confidence = {confidence:.2f}")
+
+    # Save once, even if only part of the universe could be predicted
+    # The manifest only records new predictions once they are in the prediction store; otherwise the next
+    # run would carry forward predictions that were never saved as 'unchanged'
+    record_rows(rows_in=len(symbols), rows_out=len(rows))
+    if rows:
+        try:
+            write_predictions(pd.DataFrame(rows), output_dir)
+            logger.info(f"Saved {len(rows)} predictions to {output_dir}")
+            if manifest_file:
+                save_prediction_manifest(manifest, manifest_file)
+        except Exception as e:
+            logger.error(f"Error saving predictions to {output_dir}: {e}")
+
+    logger.info(f"Historical prediction summary: {len(rows)}/{len(symbols)} predicted, {len(unchanged)} unchanged, "
+                f"{len(failures['no_data'])} without data, {len(failures['insufficient_history'])} with insufficient history, "
+                f"{len(failures['error'])} errors")
+    for reason, failed_symbols in failures.items():
+        if failed_symbols:
+            logger.warning(f"Symbols skipped ({reason}): {', '.join(sorted(failed_symbols))}")
 
     return predictions
 
 if __name__ == "__main__":
-    symbols = ["NABIL", "NIMB", "EBL", "NICA", "MBL", "SHL", "TRH", "OHL", "NHPC", "BPCL",
-        "CHCL", "STC", "BBC", "NUBL", "SANIMA", "NABBC", "NICL", "UAIL", "NIL", "IGI",
-        "NLIC", "SICL", "UNL", "BFC", "GFCL", "NMB", "PRVU", "GMFIL", "SWBBL", "EDBL",
-        "PCBL", "LBBL", "AHPC", "ALICL", "SJLIC", "GBBL", "JBBL", "CORBL", "SADBL", "SHINE",
-        "FMDBL", "GBIMEP", "MFIL", "NBL", "NLG", "SKBBL", "RLFL", "RBCLPO", "BARUN", "VLBS",
-        "HLBSL", "API", "HEIP", "GILB", "MERO", "HIDCL", "NMFBS", "RSDC", "AKPL", "UMHL",
-        "SMATA", "CHL", "HPPL", "MSLB", "SEF", "SMB", "RADHI", "WNLB", "NADEP", "PMHPL",
-        "KPCL", "AKJCL", "ALBSL", "GMFBS", "HURJA", "GLBSL", "UNHPL", "ILBS", "NBF2", "RHPL",
-        "SIGS2", "SAPDBL", "CMF2", "NICBF", "SCB", "HBL", "SBI", "LSL", "KBL",
-        "SBL", "CBBL", "DDBL", "RBCL", "NLICL", "HEI", "SPIL", "PRIN", "SALICO", "LICN",
-        "NFS", "BNL", "GUFL", "CIT", "BNT", "HDL", "PFL", "SIFC", "CFCL", "JFL",
-        "SFCL", "ICFC", "NTC", "MBLD2085", "NMB50", "NICAD8283", "SFMF", "SRBLD83", "LBLD86", "HDHPC",
-        "GWFD83", "ADBLD83", "NICLBSL", "NBLD82", "SMPDA", "LUK", "LEC", "SSHL", "SGIC", "UMRH",
-        "CGH", "NIBD84", "KEF", "SHEL", "CHDC", "PSF", "KSBBLD87", "JBLB", "NBLD87", "SAMAJ",
-        "NICSF", "PROFL", "GBIME", "CZBIL", "MDB", "HLI", "NMLBBL", "ADBL", "MLBL", "KSBBL",
-        "NIMBPO", "MPFL", "MNBBL", "SLBBL", "SINDU", "GBLBS", "SHPC", "KMCDB", "MLBBL", "RIDI",
-        "LLBS", "MLBLPO", "MATRI", "JSLBB", "NMBMF", "SWMF", "NGPL", "GRDBL", "KKHC", "MND84/85",
-        "MLBS", "MBJC", "GBBD85", "ULBSL", "CYCL", "RFPL", "DORDI", "KDBY", "PBD88", "SGHC",
-        "MHL", "USHEC", "DLBS", "BHPL", "SPL", "SMH", "MKHC", "SFEF", "MHCL", "ANLB",
-        "MAKAR", "MKHL", "DOLTI", "CITY", "PRSF", "MCHL", "SCBD", "RMF2", "MEL", "RAWA",
-        "SIGS3", "NRM", "C30MF", "GCIL", "TSHL", "KBSH", "LBBLD89", "LVF2", "MEHL", "ULHC",
-        "CLI", "MANDU", "HATHY", "BGWT", "SONA", "TVCL", "H8020", "VLUCL", "CKHL", "NWCL",
-        "NICGF2", "KSY", "SARBTM", "NIBLSTF", "MNMF1", "GMLI", "GSY", "NMIC", "CREST", "MBLEF",
-        "PURE", "SANVI", "DHPL", "FOWAD", "SPDL", "NHDL", "USLB", "JOSHI", "ACLBSL", "UPPER",
-        "SLBSL", "GHL", "SHIVM", "UPCL", "MHNL", "PPCL", "SAND2085", "SMFBS", "SJCL", "NRIC",
-        "SBIBD86", "NRN", "MEN", "PMLI", "NIFRA", "SLCF", "GLH", "MLBSL", "MFLD85", "RURU",
-        "NCCD86", "SBCF", "NIBSF2", "RMF1", "SRLI", "PBD85", "MBLD87", "MKJC", "JBBD87", "SAHAS",
-        "TPC", "MMF1", "NBF3", "SPC", "NYADI", "NBLD85", "BNHC", "ENL", "NESDO", "EBLD86",
-        "GVL", "BHL", "CCBD88", "NICFC", "BHDC", "HHL", "UHEWA", "GIBF1", "RHGCL", "SBID83",
-        "PBD84", "AVYAN", "EBLD85", "SPHL", "PPL", "NSIF2", "SIKLES", "KBLD89", "EHPL",
-        "SHLB", "PHCL", "NIBLGF", "SAGF", "UNLB", "SMHL", "AHL", "KDL", "EBLEB89", "TAMOR",
-        "SMJC", "BEDC", "IHL", "ILI", "USHL", "MLBLD89", "RNLI", "SNLI", "MSHL", "MMKJL",
-        "MKCL", "HRL", "ICFCD88", "NMBHF2", "EBLD91", "OMPL", "RSY", "NIFRAGED", "TTL"]
-    output_file = r"E:\hey\output\history prediction\history_price_prediction.csv"
+    profiling.enable_from_args()  # --profile[=cpu|memory] writes a CPU and memory profile of the run
+    output_dir = r"E:\hey\output\history prediction\history_price_prediction"
+    state_file = r"E:\hey\output\history prediction\regression_state.json"
+    manifest_file = r"E:\hey\output\history prediction\prediction_manifest.json"
     logger.info(f"Starting news processing at {datetime.now().strftime('%I:%M %p %z on %B %d, %Y')}")
-    predictions = predict_historical_patterns(symbols, output_file)
\ No newline at end of file
+    predictions = predict_historical_patterns(SYMBOLS, output_dir, state_file=state_file, max_workers=16,
+                                              manifest_file=manifest_file)
\ No newline at end of file
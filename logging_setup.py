@@ -0,0 +1,109 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+
+DEFAULT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+SUMMARY_INTERVAL = 60  # Seconds between summary lines of a per-item log
+DEBUG_EVERY = 10  # Seconds between per-item DEBUG messages a per-item log lets through
+
+_listener = None
+_lock = threading.Lock()
+
+# Queue handler that leaves formatting to the listener thread; the stock one formats the message in the
+# logging thread before enqueueing it. Records are handled in this process, so nothing needs pickling.
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        return record
+
+# Route every log record through a queue: the logging call only enqueues the record and a single
+# listener thread formats it and writes it to the console and files, so worker threads never wait on
+# log I/O. Handlers already on the root logger (e.g. from a module's logging.basicConfig) are moved
+# behind the queue; without any, a console handler is used. An explicit format/datefmt is applied to the
+# console handlers, also when an imported module's basicConfig installed them first, so an entry point's
+# format reaches the console whatever was imported before it. log_file adds a UTF-8 file handler, which
+# opens the file with the first record it writes (not on import).
+# Safe to call from every module; the first call installs the queue.
+def setup_logging(level=logging.INFO, format=None, datefmt=None, log_file=None):
+    global _listener
+    with _lock:
+        root = logging.getLogger()
+        formatter = logging.Formatter(format or DEFAULT_FORMAT, datefmt)
+        if _listener is None:
+            handlers = [handler for handler in root.handlers if not isinstance(handler, logging.handlers.QueueHandler)]
+            if not handlers:
+                console = logging.StreamHandler()
+                console.setFormatter(formatter)
+                handlers = [console]
+            for handler in handlers:
+                root.removeHandler(handler)
+            _listener = logging.handlers.QueueListener(queue.SimpleQueue(), *handlers, respect_handler_level=True)
+            root.addHandler(_DeferredQueueHandler(_listener.queue))
+            root.setLevel(level)
+            _listener.start()
+            atexit.register(stop_logging)
+        if format or datefmt:
+            for handler in _listener.handlers:
+                if isinstance(handler, logging.StreamHandler) and not isinstance(handler, logging.FileHandler):
+                    handler.setFormatter(formatter)
+        if log_file and not any(getattr(handler, 'baseFilename', None) == os.path.abspath(log_file) for handler in _listener.handlers):
+            file_handler = logging.FileHandler(log_file, encoding='utf-8', delay=True)
+            file_handler.setFormatter(formatter)
+            _listener.handlers = _listener.handlers + (file_handler,)
+
+# Flush the queue and stop the listener thread (registered at exit)
+def stop_logging():
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+# Per-item logging for hot loops: every item is counted (optionally under a key, e.g. the detected
+# language), at most one per-item DEBUG message is emitted every debug_every seconds, and a summary
+# line goes out at INFO every `interval` seconds. Messages use %-style arguments, which are only
+# formatted for the records that are actually emitted.
+class ItemLog:
+    def __init__(self, logger, name, interval=SUMMARY_INTERVAL, debug_every=DEBUG_EVERY):
+        self.logger = logger
+        self.name = name
+        self.interval = interval
+        self.debug_every = debug_every
+        self._lock = threading.Lock()
+        self._counts = {}
+        self._total = 0
+        self._window_start = time.monotonic()
+        self._last_debug = 0.0
+
+    def record(self, key=None, msg=None, *args):
+        now = time.monotonic()
+        with self._lock:
+            self._total += 1
+            if key is not None:
+                self._counts[key] = self._counts.get(key, 0) + 1
+            emit_debug = msg is not None and now - self._last_debug >= self.debug_every
+            if emit_debug:
+                self._last_debug = now
+            summary = self._take_summary(now) if now - self._window_start >= self.interval else None
+        if emit_debug and self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(msg, *args)
+        if summary:
+            self.logger.info(*summary)
+
+    # Emit the summary of the items counted since the last one, e.g. at the end of a stage
+    def flush(self):
+        with self._lock:
+            summary = self._take_summary(time.monotonic()) if self._total else None
+        if summary:
+            self.logger.info(*summary)
+
+    def _take_summary(self, now):
+        counts = ", ".join(f"{key} {count}" for key, count in sorted(self._counts.items(), key=lambda item: -item[1]))
+        summary = ("%s: %d in the last %.0fs%s", self.name, self._total, now - self._window_start, f" ({counts})" if counts else "")
+        self._counts = {}
+        self._total = 0
+        self._window_start = now
+        return summary
@@ -1,41 +1,116 @@
-import subprocess
-import time
+import argparse
 import sys
-import os
+import time
+import pandas as pd
+import metrics
+import profiling
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# Output locations shared by the stages (same paths the scripts use on their own); news, sentiment and
+# share weightage tables live in the storage layer, the CSV paths here are compatibility exports
+PATHS = {
+    "sentiment_dir": r"E:\hey\output\sentiment_results",
+    "share_weightage_file": r"E:\hey\output\share_weightage.csv",
+    "weightage_dir": r"E:\hey\output\weightage",
+    "weightage_file": r"E:\hey\output\weightage\media_weightage.json",
+    "historical_dir": r"E:\hey\output\history prediction\history_price_prediction",
+    "state_file": r"E:\hey\output\history prediction\regression_state.json",
+    "manifest_file": r"E:\hey\output\history prediction\prediction_manifest.json",
+    "final_dir": r"E:\hey\output\prediction_with_news\final_prediction\share_prediction"
+}
+
+# Each stage receives the in-memory outputs of the stages it depends on (None when a dependency was
+# skipped on resume, in which case the stage reads that input from disk) and returns its own output.
+# Stage modules are imported on first use so a resumed run never pays for stages it skips.
 
-# List your scripts in the order you want them to run
-scripts = [
-    "sentiment_analysis.py",
-    "news_price_impact.py",
-    "historical_price_prediction.py",
-    "final_price_prediction.py"  # ✅ Fixed comma typo
-]
+def run_sentiment(inputs):
+    from sentiment_analysis import process_news_files
+    return process_news_files(PATHS["sentiment_dir"])
 
-def run_scripts_in_order():
-    python_exec = sys.executable  # ✅ Ensures venv python is used
+def run_impact(inputs):
+    from news_price_impact import analyze_impact
+    return analyze_impact(PATHS["share_weightage_file"], PATHS["weightage_dir"])
 
-    print(f"\n🔧 Using Python interpreter: {python_exec}\n")
+def run_historical(inputs):
+    from historical_price_prediction import SYMBOLS, predict_historical_patterns
+    return predict_historical_patterns(SYMBOLS, PATHS["historical_dir"], state_file=PATHS["state_file"],
+                                       max_workers=16, manifest_file=PATHS["manifest_file"])
 
-    for script in scripts:
-        script_path = os.path.abspath(script)
-        print(f"▶️ Running {script_path}...\n")
+def run_final(inputs):
+    from final_price_prediction import predict_final_price
+    from sentiment_store import select_latest_sentiment
+    historical = inputs.get("historical")
+    store = inputs.get("sentiment")
+    return predict_final_price(
+        PATHS["sentiment_dir"], PATHS["weightage_file"], PATHS["historical_dir"], PATHS["final_dir"],
+        weightage=inputs.get("impact"),
+        historical_df=pd.DataFrame.from_dict(historical, orient='index') if historical else None,
+        sentiment_df=select_latest_sentiment(store) if store is not None else None
+    )
 
-        result = subprocess.run([python_exec, script_path], capture_output=True, text=True)
+# The pipeline DAG in a valid run order; historical prediction does not depend on sentiment,
+# so it runs alongside the sentiment -> impact chain
+STAGES = {
+    "sentiment": {"deps": [], "run": run_sentiment},
+    "impact": {"deps": ["sentiment"], "run": run_impact},
+    "historical": {"deps": [], "run": run_historical},
+    "final": {"deps": ["sentiment", "impact", "historical"], "run": run_final}
+}
 
-        print(f"⏹️ Completed execution of {script}\n")
+def run_stage(name, inputs):
+    start = time.perf_counter()
+    print(f"▶️ Running {name}...\n")
+    output = STAGES[name]["run"](inputs)
+    print(f"✅ Successfully finished {name} in {time.perf_counter() - start:.1f}s\n")
+    return output
 
-        if result.stdout:
-            print("📄 Output:")
-            print(result.stdout)
+# Run the DAG in-process, starting every stage as soon as its dependencies are done
+# Stages listed before from_stage are skipped and their outputs are read from disk by their dependents.
+# The first failure stops any further stage from starting; returns True when every stage succeeded.
+def run_pipeline(from_stage=None, max_workers=2):
+    order = list(STAGES)
+    pending = order[order.index(from_stage):] if from_stage else order
+    skipped = set(order) - set(pending)
+    if skipped:
+        print(f"⏭️ Resuming from {from_stage}, skipping: {', '.join(s for s in order if s in skipped)}\n")
 
-        if result.returncode != 0:
-            print(f"❌ Error in {script}:")
-            print(result.stderr)
-            exit
-        else:
-            print(f"✅ Successfully finished {script}\n")
-            time.sleep(2)  # Small delay before next script
+    metrics.new_run()
+    outputs = {}
+    done = set(skipped)
+    failed = None
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            if failed is None:
+                for name in [s for s in pending if all(dep in done for dep in STAGES[s]["deps"])]:
+                    inputs = {dep: outputs.get(dep) for dep in STAGES[name]["deps"]}
+                    running[executor.submit(run_stage, name, inputs)] = name
+                    pending.remove(name)
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                try:
+                    outputs[name] = future.result()
+                    done.add(name)
+                except Exception as e:
+                    print(f"❌ Error in {name}: {e}")
+                    failed = failed or name
 
+    if failed:
+        print(f"❌ Pipeline stopped after {failed} failed; not run: {', '.join(pending) or 'none'}")
+        print(f"   Fix the error and resume with: python main_runner.py --from-stage {failed}")
+        return False
+    return True
 
 if __name__ == "__main__":
-    run_scripts_in_order()
+    parser = argparse.ArgumentParser(description="Run the Sentimetrics pipeline in-process")
+    parser.add_argument("--from-stage", choices=list(STAGES), help="Resume from this stage, reading earlier outputs from disk")
+    parser.add_argument("--profile", nargs="?", const="all", choices=profiling.MODES,
+                        help="Write a CPU (stack samples) and/or memory (tracemalloc) profile of every stage to the "
+                             "profiles directory; stages then run one at a time so each profile holds only its stage")
+    args = parser.parse_args()
+    if args.profile:
+        profiling.enable(args.profile)
+    sys.exit(0 if run_pipeline(from_stage=args.from_stage, max_workers=1 if profiling.is_enabled() else 2) else 1)
@@ -0,0 +1,266 @@
+import functools
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime
+from sharehub_client import get_client, LATENCY_BUCKETS
+import profiling
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+METRICS_DIR = os.environ.get("SENTIMETRICS_METRICS_DIR", r"E:\hey\output\metrics")
+LEDGER_FILE = os.path.join(METRICS_DIR, "run_ledger.jsonl")  # One JSON record per stage run
+PROM_FILE = os.path.join(METRICS_DIR, "sentimetrics.prom")  # For node_exporter's textfile collector
+API_FIELDS = ('requests', 'errors', 'retries', 'throttled', 'cache_hits', 'not_modified', 'latency_sum')
+REGRESSION_RATIO = 1.5  # The report flags a cost metric this many times above its baseline
+COST_METRICS = ('wall_seconds', 'api_requests', 'api_p99_seconds', 'peak_rss_mb')
+
+_run_id = os.environ.get("SENTIMETRICS_RUN_ID") or f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{os.getpid()}"
+_local = threading.local()
+_active = {}  # stage -> number of runs in progress, to note stages whose API calls overlap
+_active_lock = threading.Lock()
+
+# Start a new run id, e.g. at the start of a pipeline run, so its stages are grouped in the ledger
+def new_run():
+    global _run_id
+    _run_id = f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{os.getpid()}"
+    return _run_id
+
+# Peak resident set size of this process in bytes, None when it cannot be measured
+# getrusage reports the peak on Linux and macOS; on Windows (no resource module) psutil's peak working
+# set is used. psutil's rss is the current size, not the peak, so it is never reported as one.
+def peak_rss_bytes():
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024  # Linux reports KiB
+    if psutil is not None:
+        return getattr(psutil.Process().memory_info(), 'peak_wset', None)
+    return None
+
+# Difference of two ShareHub client metric snapshots, per endpoint
+def _api_delta(before, after):
+    delta = {}
+    for path, stats in after.items():
+        old = before.get(path, {})
+        entry = {field: stats[field] - old.get(field, 0) for field in API_FIELDS}
+        entry['latency_buckets'] = [n - o for n, o in zip(stats['latency_buckets'], old.get('latency_buckets', [0] * len(stats['latency_buckets'])))]
+        if entry['requests'] or entry['cache_hits']:
+            delta[path] = entry
+    return delta
+
+# Set the current stage's row counts from inside the stage; a no-op outside a tracked stage
+def record_rows(rows_in=None, rows_out=None):
+    record = getattr(_local, 'record', None)
+    if record is None:
+        return
+    if rows_in is not None:
+        record['rows_in'] = rows_in
+    if rows_out is not None:
+        record['rows_out'] = rows_out
+
+# Decorator recording a stage's wall time, rows, ShareHub API calls and peak RSS to the run ledger
+# With profiling enabled the run is also profiled (see profiling.py) and the report path is recorded.
+# API calls are the client's process-wide counters over the stage's run; when other stages ran at the
+# same time (main_runner runs independent stages concurrently) they are listed in `api_overlap`.
+def track_stage(stage):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _active_lock:
+                overlap = {name for name, count in _active.items() if count}
+                _active[stage] = _active.get(stage, 0) + 1
+            record = {'run_id': _run_id, 'stage': stage, 'started_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                      'rows_in': None, 'rows_out': None, 'status': 'interrupted'}
+            outer, _local.record = getattr(_local, 'record', None), record
+            api_before = get_client().metrics.snapshot()
+            profile = profiling.start_stage(stage)
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+                record['status'] = 'ok'
+                return result
+            except Exception as e:
+                record['status'] = 'error'
+                record['error'] = str(e)
+                raise
+            finally:
+                record['wall_seconds'] = round(time.perf_counter() - start, 3)
+                if profile is not None:
+                    record['profile'] = profile.stop()
+                record['api'] = _api_delta(api_before, get_client().metrics.snapshot())
+                record['peak_rss_bytes'] = peak_rss_bytes()
+                _local.record = outer
+                with _active_lock:
+                    _active[stage] -= 1
+                    overlap |= {name for name, count in _active.items() if count}
+                record['api_overlap'] = sorted(overlap - {stage})
+                _save_record(record)
+        return wrapper
+    return decorator
+
+def _save_record(record, ledger_file=None, prom_file=None):
+    ledger_file = ledger_file or LEDGER_FILE
+    try:
+        os.makedirs(os.path.dirname(ledger_file) or '.', exist_ok=True)
+        with open(ledger_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + "\n")
+        write_prometheus(load_ledger(ledger_file), prom_file or PROM_FILE)
+        logger.info(f"Stage {record['stage']} {record['status']} in {record['wall_seconds']}s "
+                    f"(rows in {record['rows_in']}, out {record['rows_out']})")
+    except Exception as e:
+        logger.error(f"Error saving metrics for {record['stage']}: {e}")
+
+# Read every record of the run ledger, oldest first
+def load_ledger(ledger_file=None):
+    ledger_file = ledger_file or LEDGER_FILE
+    if not os.path.exists(ledger_file):
+        return []
+    records = []
+    with open(ledger_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                logger.warning(f"Skipping malformed ledger line in {ledger_file}")
+    return records
+
+# Latest record of every stage
+def latest_by_stage(records):
+    latest = {}
+    for record in records:
+        latest[record['stage']] = record
+    return latest
+
+# Latency quantile estimated from a histogram as the upper bound of the bucket holding it (inf past the last)
+def histogram_quantile(buckets, q):
+    total = sum(buckets)
+    if not total:
+        return None
+    cumulative = 0
+    for bound, count in zip(list(LATENCY_BUCKETS) + [float('inf')], buckets):
+        cumulative += count
+        if cumulative >= q * total:
+            return bound
+    return float('inf')
+
+# Metric families of the textfile: name -> (type, help)
+PROM_FAMILIES = {
+    'sentimetrics_stage_wall_seconds': ('gauge', "Wall time of the stage's latest run"),
+    'sentimetrics_stage_rows': ('gauge', "Rows read (direction=in) and written (direction=out) by the latest run"),
+    'sentimetrics_stage_success': ('gauge', "1 when the latest run succeeded"),
+    'sentimetrics_stage_peak_rss_bytes': ('gauge', "Peak resident memory of the process at the end of the latest run"),
+    'sentimetrics_stage_last_run_timestamp_seconds': ('gauge', "Start time of the latest run"),
+    'sentimetrics_api_calls': ('gauge', "ShareHub calls of the latest run by outcome"),
+    'sentimetrics_api_latency_seconds': ('histogram', "ShareHub request latency of the latest run")
+}
+
+# Write the latest run of every stage in Prometheus text exposition format, atomically
+def write_prometheus(records, prom_file=None):
+    prom_file = prom_file or PROM_FILE
+    samples = {name: [] for name in PROM_FAMILIES}
+    for stage, record in sorted(latest_by_stage(records).items()):
+        label = f'stage="{stage}"'
+        samples['sentimetrics_stage_wall_seconds'].append(f"{{{label}}} {record['wall_seconds']}")
+        for direction in ('in', 'out'):
+            if record.get(f'rows_{direction}') is not None:
+                samples['sentimetrics_stage_rows'].append(f'{{{label},direction="{direction}"}} {record[f"rows_{direction}"]}')
+        samples['sentimetrics_stage_success'].append(f"{{{label}}} {1 if record['status'] == 'ok' else 0}")
+        if record.get('peak_rss_bytes') is not None:
+            samples['sentimetrics_stage_peak_rss_bytes'].append(f"{{{label}}} {record['peak_rss_bytes']}")
+        started = datetime.strptime(record['started_at'], '%Y-%m-%d %H:%M:%S').timestamp()
+        samples['sentimetrics_stage_last_run_timestamp_seconds'].append(f"{{{label}}} {started:.0f}")
+        for path, stats in sorted(record.get('api', {}).items()):
+            endpoint = f'{label},endpoint="{path}"'
+            for field in ('requests', 'errors', 'retries', 'throttled', 'cache_hits', 'not_modified'):
+                samples['sentimetrics_api_calls'].append(f'{{{endpoint},outcome="{field}"}} {stats[field]}')
+            cumulative = 0
+            for bound, count in zip(list(LATENCY_BUCKETS) + ['+Inf'], stats['latency_buckets']):
+                cumulative += count
+                samples['sentimetrics_api_latency_seconds'].append(f'_bucket{{{endpoint},le="{bound}"}} {cumulative}')
+            samples['sentimetrics_api_latency_seconds'].append(f"_sum{{{endpoint}}} {stats['latency_sum']:.6f}")
+            samples['sentimetrics_api_latency_seconds'].append(f"_count{{{endpoint}}} {stats['requests']}")
+
+    lines = []
+    for name, (kind, help_text) in PROM_FAMILIES.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(f"{name}{sample}" for sample in samples[name])
+
+    os.makedirs(os.path.dirname(prom_file) or '.', exist_ok=True)
+    tmp_file = f"{prom_file}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_file, prom_file)
+
+# Comparable numbers of one record: wall time, rows, API calls and the worst endpoint p99
+def _summary(record):
+    api = record.get('api', {})
+    p99s = [histogram_quantile(stats['latency_buckets'], 0.99) for stats in api.values()]
+    p99s = [p for p in p99s if p is not None]
+    return {
+        'wall_seconds': record.get('wall_seconds'),
+        'rows_in': record.get('rows_in'),
+        'rows_out': record.get('rows_out'),
+        'api_requests': sum(stats['requests'] for stats in api.values()),
+        'api_p99_seconds': max(p99s) if p99s else None,
+        'peak_rss_mb': record['peak_rss_bytes'] / 2 ** 20 if record.get('peak_rss_bytes') else None
+    }
+
+# Compare every stage's latest successful run to the median of its previous `baseline_runs` successful runs
+def compare_to_baseline(records, baseline_runs=7):
+    report = {}
+    by_stage = {}
+    for record in records:
+        if record.get('status') == 'ok':
+            by_stage.setdefault(record['stage'], []).append(_summary(record))
+    for stage, summaries in by_stage.items():
+        latest, history = summaries[-1], summaries[-baseline_runs - 1:-1]
+        report[stage] = {}
+        for metric, value in latest.items():
+            previous = [s[metric] for s in history if s[metric] is not None]
+            baseline = statistics.median(previous) if previous else None
+            ratio = value / baseline if value is not None and baseline not in (None, 0) else None
+            report[stage][metric] = {'latest': value, 'baseline': baseline, 'ratio': ratio}
+    return report
+
+def _format(value):
+    if value is None:
+        return '-'
+    return f"{value:.3f}" if isinstance(value, float) else str(value)
+
+# Print the baseline comparison as a table
+def print_report(ledger_file=None, baseline_runs=7):
+    report = compare_to_baseline(load_ledger(ledger_file), baseline_runs)
+    if not report:
+        print("No successful stage runs in the ledger yet")
+        return
+    print(f"{'stage':<12} {'metric':<16} {'latest':>12} {'baseline':>12} {'ratio':>8}")
+    for stage, metrics in sorted(report.items()):
+        for metric, values in metrics.items():
+            ratio = values['ratio']
+            flag = '  <-- regression' if metric in COST_METRICS and ratio is not None and ratio >= REGRESSION_RATIO else ''
+            print(f"{stage:<12} {metric:<16} {_format(values['latest']):>12} {_format(values['baseline']):>12} "
+                  f"{'-' if ratio is None else f'{ratio:.2f}x':>8}{flag}")
+
+if __name__ == "__main__":
+    # Usage: python metrics.py report [baseline_runs]
+    if len(sys.argv) >= 2 and sys.argv[1] == "report":
+        print_report(baseline_runs=int(sys.argv[2]) if len(sys.argv) > 2 else 7)
+    else:
+        print("Usage: python metrics.py report [baseline_runs]")
+        sys.exit(1)
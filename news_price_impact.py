@@ -1,24 +1,33 @@
 import pandas as pd
-import requests
+import numpy as np
 import logging
 import os
 import json
 from datetime import datetime, timedelta
 from urllib.parse import urlparse
+import storage
+from metrics import track_stage, record_rows
+import profiling
+from price_matrix import PriceMatrix
+from sentiment_store import load_sentiment_store
+from sharehub_client import get_client, CANDLE_PATH
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# API endpoint for candle chart data
-API_URL = "https://sharehubnepal.com/data/api/v1/candle-chart/history"
+# Candle history is cached for an hour so re-runs within a session do not refetch it
+CANDLE_TTL = 60 * 60
 
 # Function to convert publishDate to Unix timestamp (milliseconds)
 def to_unix_timestamp(date_str):
     try:
-        if not date_str or pd.isna(date_str):
+        if date_str is None or pd.isna(date_str) or not str(date_str).strip():
             logger.error(f"Invalid or empty date_str: {date_str}")
             return None
+        # Typed dates from the storage layer are converted directly
+        if isinstance(date_str, datetime):
+            return int(date_str.timestamp() * 1000)
         # Handle various date formats, including ISO 8601 UTC
         for fmt in ['%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%d-%m-%Y', '%d/%m/%Y', '%B %d, %Y', '%Y-%m-%dT%H:%M:%S.%fZ']:
             try:
@@ -41,7 +50,7 @@ def fetch_candle_data(symbol):
             "countback": 60,  # Increased to 60 days to ensure coverage
             "isAdjust": "true"
         }
-        response = requests.get(API_URL, params=params, timeout=10)
+        response = get_client().get(CANDLE_PATH, params=params, ttl=CANDLE_TTL)
         if response.status_code == 200:
             data = response.json()
             if data.get("success") and data.get("data"):
@@ -55,6 +64,20 @@ def fetch_candle_data(symbol):
         logger.error(f"Error fetching candle data for {symbol}: {e}")
         return None
 
+# Candle times (unix ms) and closes for a symbol, from a mapped price matrix when one is given
+# (only the days the symbol traded) or from the API; (None, None) when there is no data
+def load_candle_series(symbol, matrix=None):
+    if matrix is not None:
+        if symbol not in matrix:
+            return None, None
+        times, _, closes, _ = matrix.series(symbol)
+        traded = ~np.isnan(closes)
+        return times[traded], closes[traded]
+    candle_data = fetch_candle_data(symbol)
+    if not candle_data or not candle_data.get("data"):
+        return None, None
+    return [item["time"] for item in candle_data["data"]], [item["close"] for item in candle_data["data"]]
+
 # Function to extract domain from mediaUrl
 def get_domain(media_url):
     try:
@@ -63,10 +86,16 @@ def get_domain(media_url):
         return "unknown"
 
 # Function to compare news sentiment with price change and assign average website weight
-def analyze_impact(input_dir, output_file, weightage_dir):
-    if not os.path.exists(input_dir) or not os.listdir(input_dir):
-        logger.error(f"Input directory {input_dir} is empty or does not exist")
-        return
+# Sentiment is read from the storage layer; the per-article results go to the `share_weightage` table
+# (and to output_file as CSV for compatibility when given). Returns the per-website stats (the media weightage)
+# With a price_matrix_dir candles come from the memory-mapped universe matrix instead of the API.
+@track_stage("impact")
+def analyze_impact(output_file, weightage_dir, root=None, price_matrix_dir=None):
+    matrix = PriceMatrix.open_dir(price_matrix_dir) if price_matrix_dir else None
+    sentiment = load_sentiment_store(root=root)
+    if sentiment.empty:
+        logger.error("Sentiment store is empty or does not exist")
+        return None
 
     website_stats = {}  # Track correct, incorrect, and total predictions per website
     results = []
@@ -79,84 +108,69 @@ def analyze_impact(input_dir, output_file, weightage_dir):
             website_stats = json.load(f)
             logger.info(f"Loaded existing stats from {weightage_file}")
 
-    for filename in os.listdir(input_dir):
-        if filename.endswith("_share_sentiment.csv"):
-            file_path = os.path.join(input_dir, filename)
-            logger.info(f"Processing file: {filename}")
-            try:
-                df = pd.read_csv(file_path, encoding="utf-8-sig")
-                if df.empty:
-                    logger.info(f"No data in {file_path}")
-                    continue
-
-                # Validate required columns
-                required_cols = ['articleId', 'publishedDate', 'sentiment_score', 'mediaUrl']
-                if not all(col in df.columns for col in required_cols):
-                    logger.error(f"Missing columns in {file_path}: {required_cols}")
-                    continue
+    for symbol, df in sentiment.groupby('symbol', sort=False):
+        logger.info(f"Processing sentiment for {symbol}")
+        try:
+            candles, prices = load_candle_series(symbol, matrix)
+            if candles is None or not len(candles):
+                continue
 
-                symbol = filename.replace("_share_sentiment.csv", "")
-                candle_data = fetch_candle_data(symbol)
-                if not candle_data or not candle_data.get("data"):
+            for index, row in df.iterrows():
+                publish_date = row['publishedDate']
+                logger.debug("Processing publishDate: %s", publish_date)
+                unix_time = to_unix_timestamp(publish_date)
+                if unix_time is None:
                     continue
 
-                for index, row in df.iterrows():
-                    publish_date = row['publishedDate']
-                    logger.debug(f"Processing publishDate: {publish_date}")
-                    unix_time = to_unix_timestamp(publish_date)
-                    if unix_time is None:
-                        continue
-
-                    # Find candle data for publish date and 2 days after
-                    candles = [item["time"] for item in candle_data["data"]]
-                    prices = [item["close"] for item in candle_data["data"]]
-                    matched = False
-                    for i, candle_time in enumerate(candles):
-                        if abs(candle_time - unix_time) < 259200000:  # 3-day tolerance
-                            matched = True
-                            logger.debug(f"Matched {publish_date} with API time {candle_time}")
-                            # Check price change 2 days later (if data available)
-                            if i + 2 < len(candles):
-                                price_now = prices[i]
-                                price_after_2d = prices[i + 2]
-                                price_change = (price_after_2d - price_now) / price_now * 100  # Percentage change
-                                sentiment_score = row['sentiment_score']
-
-                                # Determine predicted and actual directions
-                                predicted_dir = "positive" if sentiment_score > 0 else "negative" if sentiment_score < 0 else "neutral"
-                                actual_dir = "positive" if price_change > 0.1 else "negative" if price_change < -0.1 else "neutral"
-
-                                # Buffer article for pair processing
-                                website = get_domain(row['mediaUrl'])
-                                if website not in article_buffer:
-                                    article_buffer[website] = []
-                                article_buffer[website].append({
-                                    "articleId": row['articleId'],
-                                    "publishDate": publish_date,
-                                    "mediaUrl": row['mediaUrl'],
-                                    "sentiment_score": sentiment_score,
-                                    "price_change_2d (%)": price_change,
-                                    "predicted_dir": predicted_dir,
-                                    "actual_dir": actual_dir,
-                                    "index": index
-                                })
-
-                                results.append({
-                                    "articleId": row['articleId'],
-                                    "symbol": symbol,
-                                    "publishDate": publish_date,
-                                    "mediaUrl": row['mediaUrl'],
-                                    "sentiment_score": sentiment_score,
-                                    "price_change_2d (%)": price_change,
-                                    "predicted_dir": predicted_dir,
-                                    "actual_dir": actual_dir
-                                })
-                            break
-                    if not matched:
-                        logger.warning(f"No matching candle data for {publish_date} (unix: {unix_time}) in {symbol}")
-
-            except Exception as e:
-                logger.error(f"Error processing {file_path}: {e}")
+                # Find candle data for publish date and 2 days after
+                matched = False
+                for i, candle_time in enumerate(candles):
+                    if abs(candle_time - unix_time) < 259200000:  # 3-day tolerance
+                        matched = True
+                        logger.debug("Matched %s with API time %s", publish_date, candle_time)
+                        # Check price change 2 days later (if data available)
+                        if i + 2 < len(candles):
+                            price_now = prices[i]
+                            price_after_2d = prices[i + 2]
+                            price_change = (price_after_2d - price_now) / price_now * 100  # Percentage change
+                            sentiment_score = row['sentiment_score']
+
+                            # Determine predicted and actual directions
+                            predicted_dir = "positive" if sentiment_score > 0 else "negative" if sentiment_score < 0 else "neutral"
+                            actual_dir = "positive" if price_change > 0.1 else "negative" if price_change < -0.1 else "neutral"
+
+                            # Buffer article for pair processing
+                            website = get_domain(row['mediaUrl'])
+                            if website not in article_buffer:
+                                article_buffer[website] = []
+                            article_buffer[website].append({
+                                "articleId": row['articleId'],
+                                "publishDate": publish_date,
+                                "mediaUrl": row['mediaUrl'],
+                                "sentiment_score": sentiment_score,
+                                "price_change_2d (%)": price_change,
+                                "predicted_dir": predicted_dir,
+                                "actual_dir": actual_dir,
+                                "index": index
+                            })
+
+                            results.append({
+                                "articleId": row['articleId'],
+                                "symbol": symbol,
+                                "publishDate": publish_date,
+                                "mediaUrl": row['mediaUrl'],
+                                "sentiment_score": sentiment_score,
+                                "price_change_2d (%)": price_change,
+                                "predicted_dir": predicted_dir,
+                                "actual_dir": actual_dir,
+                                "clusterId": row.get('clusterId')
+                            })
+                        break
+                if not matched:
+                    logger.warning(f"No matching candle data for {publish_date} (unix: {unix_time}) in {symbol}")
+
+        except Exception as e:
+            logger.error(f"Error processing sentiment for {symbol}: {e}")
 
     # Process pairs and update website stats
     for website, articles in article_buffer.items():
@@ -181,25 +195,29 @@ def analyze_impact(input_dir, output_file, weightage_dir):
         correct = stats["correct"]
         stats["average_weight"] = (correct / total_pairs) if total_pairs > 0 else 0.0
 
-    # Save results to share_weightage.csv
+    # Save results to the share_weightage table
+    record_rows(rows_in=len(sentiment), rows_out=len(results))
     if results:
         output_df = pd.DataFrame(results)
         # Add average weight to results based on website domain
         output_df['media_weight'] = output_df['mediaUrl'].apply(lambda url: website_stats.get(get_domain(url), {}).get('average_weight', 0.0))
-        output_df.to_csv(output_file, index=False, encoding="utf-8-sig")
-        logger.info(f"Saved weightage results to {output_file} with {len(output_df)} entries")
+        storage.replace_table("share_weightage", output_df, root=root)
+        logger.info(f"Saved weightage results to the share_weightage table with {len(output_df)} entries")
+        if output_file:
+            storage.export_csv("share_weightage", output_file, root=root)
     else:
-        logger.warning(f"No results to save to {output_file}. Check logs for details.")
+        logger.warning("No weightage results to save. Check logs for details.")
 
     # Save website stats to file
     os.makedirs(weightage_dir, exist_ok=True)
     with open(weightage_file, 'w', encoding='utf-8') as f:
         json.dump(website_stats, f, ensure_ascii=False, indent=4)
     logger.info(f"Saved website stats to {weightage_file}")
+    return website_stats
 
 if __name__ == "__main__":
-    input_dir = r"E:\hey\output\sentiment_results"
+    profiling.enable_from_args()  # --profile[=cpu|memory] writes a CPU and memory profile of the run
     output_file = r"E:\hey\output\share_weightage.csv"
     weightage_dir = r"E:\hey\output\weightage"
     logger.info("Starting news price impact analysis at 04:15 PM +0545 on July 29, 2025")
-    analyze_impact(input_dir, output_file, weightage_dir)
\ No newline at end of file
+    analyze_impact(output_file, weightage_dir)
\ No newline at end of file
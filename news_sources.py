@@ -0,0 +1,167 @@
+import abc
+import json
+import logging
+import os
+import time
+import xml.etree.ElementTree as ET
+from email.utils import parsedate_to_datetime
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 200  # Items per page; ShareHub serves at most this many per request
+
+# A news source for process_news: pages of raw items behind a resumable cursor, and the mapping of a raw
+# item to the fields classification reads (id, title, summary, publishedDate, mediaUrl, source).
+#   fetch(cursor)      one page: {"items": [...], "next": cursor after the page, "failed": bool}
+#   paginate(cursor)   pages from cursor on (None = the newest), ending when the source is exhausted;
+#                      a failed fetch is yielded as a page with "failed" set and ends the pagination
+#   normalize(item)    the raw item as classify_news_item expects it
+#   resume_cursor(c)   where the next crawl starts, given the cursor a completed crawl ended at
+# Cursors must be JSON-serializable since they are kept in the crawl checkpoint.
+class NewsSource(abc.ABC):
+    name = "source"
+
+    @abc.abstractmethod
+    def fetch(self, cursor=None):
+        ...
+
+    def paginate(self, cursor=None):
+        while True:
+            page = self.fetch(cursor)
+            if page['failed'] or not page['items']:
+                if page['failed']:
+                    yield page
+                return
+            yield page
+            cursor = page['next']
+            if len(page['items']) < PAGE_SIZE:
+                return
+
+    def normalize(self, item):
+        return dict(item, source=self.name)
+
+    # Feeds served newest first are crawled from the newest item again; sources read oldest first
+    # continue after the last item the completed crawl read
+    def resume_cursor(self, cursor):
+        return None
+
+# ShareHub's khula-manch feed, newest first, paged by the id of the last post seen
+# fetch_news is classified_news.fetch_sharehub_news (passed in so this module does not import the classifier)
+class ShareHubSource(NewsSource):
+    name = "ShareHub"
+
+    def __init__(self, fetch_news, empty_page_retry_delay=5):
+        self.fetch_news = fetch_news
+        self.empty_page_retry_delay = empty_page_retry_delay
+
+    def fetch(self, cursor=None):
+        data = self.fetch_news(cursor)
+        items = data.get('data') or []
+        return {"items": items, "next": items[-1].get('id') if items else cursor, "failed": bool(data.get('failed'))}
+
+    def paginate(self, cursor=None):
+        while True:
+            page = self.fetch(cursor)
+            if not page['items']:
+                # An empty or failed page is retried once before the crawl gives up on it
+                logger.warning("No more data available from ShareHub, attempting to fetch more...")
+                time.sleep(self.empty_page_retry_delay)
+                page = self.fetch(cursor)
+                if page['failed']:
+                    yield page
+                    return
+                if not page['items']:
+                    return
+            yield page
+            cursor = page['next']
+            if len(page['items']) < PAGE_SIZE:
+                return
+
+# Articles from a local file, oldest first: JSON Lines with one ShareHub-style item per line
+# (id, title, summary, publishedDate, mediaUrl) in file order, or an RSS 2.0 feed (.xml/.rss), whose
+# newest-first items are read in reverse. The cursor is the id of the last item read, so the next crawl
+# only reads the items appended (or published to the feed) since; when that item is gone (the file was
+# replaced, or the entry dropped off the feed) the file is read from its start again. Ids are prefixed
+# with the source name so they never collide with ShareHub's numeric ids.
+class FileSource(NewsSource):
+    def __init__(self, path, name=None):
+        self.path = path
+        self.name = name or os.path.splitext(os.path.basename(path))[0]
+
+    def _read_items(self):
+        if os.path.splitext(self.path)[1].lower() in ('.xml', '.rss'):
+            return self._read_rss()
+        items = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                if line.strip():
+                    try:
+                        items.append(json.loads(line))
+                    except ValueError:
+                        logger.warning(f"Skipping malformed line {line_number} of {self.path}")
+        return items
+
+    def _read_rss(self):
+        items = []
+        for entry in ET.parse(self.path).getroot().iter('item'):
+            published = entry.findtext('pubDate')
+            try:
+                published = parsedate_to_datetime(published).isoformat() if published else ''
+            except (TypeError, ValueError):
+                pass
+            items.append({
+                "id": entry.findtext('guid') or entry.findtext('link'),
+                "title": entry.findtext('title') or '',
+                "summary": entry.findtext('description') or '',
+                "publishedDate": published,
+                "mediaUrl": entry.findtext('link') or ''
+            })
+        return items[::-1]
+
+    def _load(self):
+        try:
+            return self._read_items()
+        except Exception as e:
+            logger.error(f"Error reading news file {self.path}: {e}")
+            return None
+
+    # Position after the last item with the cursor's id, 0 when there is none
+    def _start(self, items, cursor):
+        if cursor is None:
+            return 0
+        for position in range(len(items) - 1, -1, -1):
+            if str(items[position].get('id')) == cursor:
+                return position + 1
+        logger.warning(f"Last read item {cursor} no longer in {self.path}, reading it from the start")
+        return 0
+
+    def _page(self, items, start, cursor):
+        page = items[start:start + PAGE_SIZE]
+        return {"items": page, "next": str(page[-1].get('id')) if page else cursor, "failed": False}
+
+    def fetch(self, cursor=None):
+        items = self._load()
+        if items is None:
+            return {"items": [], "next": cursor, "failed": True}
+        return self._page(items, self._start(items, cursor), cursor)
+
+    # The file is read once per pagination rather than once per page
+    def paginate(self, cursor=None):
+        items = self._load()
+        if items is None:
+            yield {"items": [], "next": cursor, "failed": True}
+            return
+        start = self._start(items, cursor)
+        while start < len(items):
+            page = self._page(items, start, cursor)
+            start += len(page['items'])
+            cursor = page['next']
+            yield page
+
+    def resume_cursor(self, cursor):
+        return cursor
+
+    def normalize(self, item):
+        return dict(item, id=f"{self.name}:{item.get('id', '')}", source=self.name)
@@ -0,0 +1,159 @@
+import json
+import logging
+import math
+import os
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from final_price_prediction import (load_media_weightage, load_historical_predictions, load_latest_sentiment,
+                                    adjust_universe_with_sentiment)
+from prediction_store import LATEST_FILE
+import storage
+from sentiment_store import SENTIMENT_TABLE, sentiment_store_exists
+from logging_setup import setup_logging
+
+# Set up logging through the shared logging queue
+setup_logging()
+logger = logging.getLogger(__name__)
+
+RELOAD_INTERVAL = 2.0  # Seconds between checks for changed pipeline outputs
+
+# In-memory final predictions for every symbol, rebuilt whenever an underlying output changes
+# Queries only read the current snapshot dict, which a reload swaps in one assignment
+class PredictionCache:
+    def __init__(self, sentiment_dir, weightage_file, historical_file):
+        self.sentiment_dir = sentiment_dir
+        self.weightage_file = weightage_file
+        self.historical_file = historical_file
+        self.predictions = {}
+        self.loaded_at = None
+        self._signature = None
+        self._lock = threading.Lock()
+
+    # Files whose modification times decide when to reload
+    def watched_paths(self):
+        historical = self.historical_file
+        if not historical.endswith('.csv'):
+            historical = os.path.join(historical, LATEST_FILE)
+        return [self.weightage_file, historical]
+
+    # Sentiment changes are seen through the store's write marker, or without a store through the legacy
+    # per-symbol CSV files themselves: a file rewritten in place does not change the directory's mtime
+    def _current_signature(self):
+        if sentiment_store_exists():
+            sentiment = storage.table_version(SENTIMENT_TABLE)
+        elif os.path.isdir(self.sentiment_dir):
+            with os.scandir(self.sentiment_dir) as entries:
+                sentiment = tuple(sorted((entry.name, entry.stat().st_mtime_ns, entry.stat().st_size) for entry in entries
+                                         if entry.name.endswith('_share_sentiment.csv')))
+        else:
+            sentiment = None
+        return tuple(os.stat(path).st_mtime_ns if os.path.exists(path) else None for path in self.watched_paths()) + (sentiment,)
+
+    # Rebuild the snapshot from disk
+    def reload(self):
+        with self._lock:
+            signature = self._current_signature()
+            weightage = load_media_weightage(self.weightage_file)
+            historical_df = load_historical_predictions(self.historical_file)
+            if historical_df.empty:
+                predictions = {}
+            else:
+                sentiment_df = load_latest_sentiment(self.sentiment_dir, historical_df.index)
+                final_df = adjust_universe_with_sentiment(historical_df, sentiment_df, weightage)
+                # Missing values are served as null; json.dumps would write them as NaN, which is not JSON
+                predictions = {str(symbol): {key: None if math.isnan(value) else float(value) for key, value in row.items()}
+                               for symbol, row in final_df.to_dict('index').items()}
+            self.predictions = predictions
+            self.loaded_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            self._signature = signature
+            logger.info(f"Loaded {len(predictions)} final predictions into the service")
+
+    # Reload only when a watched output changed since the last load
+    def reload_if_changed(self):
+        if self._current_signature() != self._signature:
+            self.reload()
+
+    def get(self, symbol):
+        return self.predictions.get(symbol)
+
+    def get_many(self, symbols):
+        predictions = self.predictions
+        return {symbol: predictions.get(symbol) for symbol in symbols}
+
+# Poll the watched outputs in the background so queries never wait on a reload
+def watch_for_changes(cache, stop_event, interval=RELOAD_INTERVAL):
+    while not stop_event.wait(interval):
+        try:
+            cache.reload_if_changed()
+        except Exception as e:
+            logger.error(f"Error reloading predictions: {e}")
+
+# HTTP endpoints:
+#   GET /health                    load time and symbol count
+#   GET /predict/<symbol>          one symbol's final prediction
+#   GET /predict?symbols=A,B,C     several symbols at once
+#   GET /predictions               every symbol
+class PredictionHandler(BaseHTTPRequestHandler):
+    cache = None
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, allow_nan=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        path = url.path.rstrip('/')
+        if path == '/health':
+            self._send_json(200, {'loaded_at': self.cache.loaded_at, 'symbols': len(self.cache.predictions)})
+        elif path == '/predictions':
+            self._send_json(200, self.cache.predictions)
+        elif path == '/predict':
+            symbols = [s.strip().upper() for s in parse_qs(url.query).get('symbols', [''])[0].split(',') if s.strip()]
+            if not symbols:
+                self._send_json(400, {'error': 'Pass symbols=A,B,...'})
+                return
+            self._send_json(200, self.cache.get_many(symbols))
+        elif path.startswith('/predict/'):
+            symbol = path[len('/predict/'):].upper()
+            prediction = self.cache.get(symbol)
+            if prediction is None:
+                self._send_json(404, {'error': f"No prediction for {symbol}"})
+                return
+            self._send_json(200, {'symbol': symbol, **prediction})
+        else:
+            self._send_json(404, {'error': 'Unknown endpoint'})
+
+    # Keep per-request access logs out of the pipeline log
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+# Run the service until interrupted
+def serve_predictions(sentiment_dir, weightage_file, historical_file, host='127.0.0.1', port=8765):
+    cache = PredictionCache(sentiment_dir, weightage_file, historical_file)
+    cache.reload()
+    stop_event = threading.Event()
+    watcher = threading.Thread(target=watch_for_changes, args=(cache, stop_event), daemon=True)
+    watcher.start()
+
+    handler = type('BoundPredictionHandler', (PredictionHandler,), {'cache': cache})
+    server = ThreadingHTTPServer((host, port), handler)
+    logger.info(f"Prediction service listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Stopping prediction service")
+    finally:
+        stop_event.set()
+        server.server_close()
+
+if __name__ == "__main__":
+    sentiment_dir = r"E:\hey\output\sentiment_results"
+    weightage_file = r"E:\hey\output\weightage\media_weightage.json"
+    historical_file = r"E:\hey\output\history prediction\history_price_prediction"
+    serve_predictions(sentiment_dir, weightage_file, historical_file)
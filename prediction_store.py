@@ -0,0 +1,132 @@
+import pandas as pd
+import logging
+import os
+import shutil
+import sys
+from datetime import datetime, timedelta
+from storage import write_parquet
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Prediction datasets are directories of Parquet files:
+#   date=YYYY-MM-DD/part-*.parquet   one partition per run date
+#   month=YYYY-MM/part-*.parquet     daily partitions merged by compact_partitions
+#   latest.parquet                   newest prediction per symbol, for fast lookup
+LATEST_FILE = "latest.parquet"
+DAY_PREFIX = "date="
+MONTH_PREFIX = "month="
+
+# Append one run's predictions as a new file in that run date's partition
+def write_partition(df, dataset_dir, run_time=None):
+    run_time = run_time or datetime.now()
+    partition_dir = os.path.join(dataset_dir, f"{DAY_PREFIX}{run_time.strftime('%Y-%m-%d')}")
+    os.makedirs(partition_dir, exist_ok=True)
+    path = os.path.join(partition_dir, f"part-{run_time.strftime('%H%M%S%f')}-{os.getpid()}.parquet")
+    write_parquet(df, path)
+    logger.info(f"Wrote {len(df)} predictions to {path}")
+    return path
+
+# Merge new predictions into the latest-per-symbol snapshot
+def update_latest_snapshot(df, dataset_dir):
+    latest = read_latest(dataset_dir)
+    if not latest.empty:
+        df = pd.concat([latest[~latest['symbol'].isin(df['symbol'])], df], ignore_index=True)
+    os.makedirs(dataset_dir, exist_ok=True)
+    write_parquet(df, os.path.join(dataset_dir, LATEST_FILE))
+    return df
+
+# Write one run's predictions: a new partition file plus the refreshed latest snapshot
+def write_predictions(df, dataset_dir, run_time=None):
+    if df.empty:
+        logger.warning(f"No predictions to write to {dataset_dir}")
+        return
+    df = df.copy()
+    df['date'] = pd.to_datetime(df['date'])
+    write_partition(df, dataset_dir, run_time=run_time)
+    update_latest_snapshot(df, dataset_dir)
+
+# Read the latest-per-symbol snapshot, empty if the dataset has none yet
+def read_latest(dataset_dir):
+    path = os.path.join(dataset_dir, LATEST_FILE)
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    return pd.read_parquet(path)
+
+# List (first day, last day, directory) for every partition in the dataset
+def list_partitions(dataset_dir):
+    partitions = []
+    if not os.path.isdir(dataset_dir):
+        return partitions
+    for name in sorted(os.listdir(dataset_dir)):
+        path = os.path.join(dataset_dir, name)
+        if not os.path.isdir(path):
+            continue
+        if name.startswith(DAY_PREFIX):
+            day = datetime.strptime(name[len(DAY_PREFIX):], '%Y-%m-%d').date()
+            partitions.append((day, day, path))
+        elif name.startswith(MONTH_PREFIX):
+            first = datetime.strptime(name[len(MONTH_PREFIX):], '%Y-%m').date()
+            last = (first.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+            partitions.append((first, last, path))
+    return partitions
+
+# Read predictions between two dates (inclusive), touching only the partitions that overlap the range
+def read_predictions(dataset_dir, start_date=None, end_date=None, symbols=None):
+    frames = []
+    for first, last, path in list_partitions(dataset_dir):
+        if (start_date and last < start_date) or (end_date and first > end_date):
+            continue
+        for name in sorted(os.listdir(path)):
+            if name.endswith('.parquet'):
+                frames.append(pd.read_parquet(os.path.join(path, name)))
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames, ignore_index=True)
+    days = df['date'].dt.date
+    mask = pd.Series(True, index=df.index)
+    if start_date:
+        mask &= days >= start_date
+    if end_date:
+        mask &= days <= end_date
+    if symbols is not None:
+        mask &= df['symbol'].isin(symbols)
+    return df[mask].reset_index(drop=True)
+
+# Merge daily partitions older than `older_than_days` into one file per month
+def compact_partitions(dataset_dir, older_than_days=30):
+    cutoff = datetime.now().date() - timedelta(days=older_than_days)
+    by_month = {}
+    for first, last, path in list_partitions(dataset_dir):
+        if os.path.basename(path).startswith(DAY_PREFIX) and last < cutoff:
+            by_month.setdefault(first.strftime('%Y-%m'), []).append(path)
+
+    for month, day_dirs in by_month.items():
+        month_dir = os.path.join(dataset_dir, f"{MONTH_PREFIX}{month}")
+        sources = [os.path.join(month_dir, name) for name in os.listdir(month_dir)] if os.path.isdir(month_dir) else []
+        for day_dir in day_dirs:
+            sources += [os.path.join(day_dir, name) for name in os.listdir(day_dir)]
+        sources = [path for path in sources if path.endswith('.parquet')]
+        df = pd.concat([pd.read_parquet(path) for path in sources], ignore_index=True).sort_values('date', kind='stable')
+
+        # Write the merged file before removing anything it replaces
+        os.makedirs(month_dir, exist_ok=True)
+        compacted = os.path.join(month_dir, f"part-compacted-{datetime.now().strftime('%Y%m%d%H%M%S')}.parquet")
+        write_parquet(df, compacted)
+        for path in sources:
+            if os.path.dirname(path) == month_dir:
+                os.remove(path)
+        for day_dir in day_dirs:
+            shutil.rmtree(day_dir)
+        logger.info(f"Compacted {len(day_dirs)} daily partitions into {compacted} with {len(df)} rows")
+    return sorted(by_month)
+
+if __name__ == "__main__":
+    # Usage: python prediction_store.py compact <dataset_dir> [older_than_days]
+    if len(sys.argv) < 3 or sys.argv[1] != "compact":
+        print("Usage: python prediction_store.py compact <dataset_dir> [older_than_days]")
+        sys.exit(1)
+    older_than_days = int(sys.argv[3]) if len(sys.argv) > 3 else 30
+    months = compact_partitions(sys.argv[2], older_than_days=older_than_days)
+    logger.info(f"Compaction finished for {len(months)} months")
@@ -0,0 +1,182 @@
+import numpy as np
+import pandas as pd
+import json
+import logging
+import os
+import shutil
+import sys
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+PRICE_MATRIX_DIR = r"E:\hey\output\price_matrix"
+MATRIX_VERSION = 1
+FIELDS = ('open', 'close', 'volume')
+CURRENT_FILE = "current.json"  # Names the generation readers should open
+KEEP_GENERATIONS = 2  # Previous generations kept after a rebuild, for readers that opened them before the switch
+
+# Layout of a matrix directory:
+#   current.json                       {"generation": "gen-YYYYMMDDHHMMSS"}
+#   gen-YYYYMMDDHHMMSS/index.json      symbols, per-symbol first/last trading day, version
+#   gen-YYYYMMDDHHMMSS/dates.npy       int64 unix ms of every trading day of the universe, ascending
+#   gen-YYYYMMDDHHMMSS/open.npy        float64 symbols x days, NaN where a symbol has no candle
+#   gen-YYYYMMDDHHMMSS/close.npy       (same)
+#   gen-YYYYMMDDHHMMSS/volume.npy      (same)
+# A rebuild writes a new generation and then switches current.json, so processes that still have the
+# old generation mapped keep a consistent view. The previous KEEP_GENERATIONS generations are kept, so a
+# reader that read current.json just before a switch can still open the files it names; older ones are
+# deleted. A generation that cannot be deleted yet (on Windows, while a process still maps it) is left
+# in place and deleted by a later rebuild.
+
+# Unix ms of a timestamp given as unix ms, datetime or date string
+def to_unix_ms(ts):
+    if isinstance(ts, (int, np.integer)):
+        return int(ts)
+    return int(pd.Timestamp(ts).value // 1_000_000)
+
+# Universe history as read-only memory-mapped symbols x days arrays
+# Row slices, day-range slices and symbol spans are views into the mapped files, so any number of
+# processes share one copy of the history through the OS page cache.
+class PriceMatrix:
+    def __init__(self, path, index, dates, arrays):
+        self.path = path
+        self.symbols = index['symbols']
+        self.built_at = index.get('built_at')
+        self.first = np.asarray(index['first'], dtype=np.int64)
+        self.last = np.asarray(index['last'], dtype=np.int64)
+        self.symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.dates = dates
+        self.open = arrays['open']
+        self.close = arrays['close']
+        self.volume = arrays['volume']
+
+    # Map the current generation of a matrix directory
+    @classmethod
+    def open_dir(cls, matrix_dir=PRICE_MATRIX_DIR):
+        with open(os.path.join(matrix_dir, CURRENT_FILE), 'r', encoding='utf-8') as f:
+            path = os.path.join(matrix_dir, json.load(f)['generation'])
+        with open(os.path.join(path, 'index.json'), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if index.get('version') != MATRIX_VERSION:
+            raise ValueError(f"Unsupported price matrix version {index.get('version')} in {path}")
+        dates = np.load(os.path.join(path, 'dates.npy'), mmap_mode='r')
+        arrays = {field: np.load(os.path.join(path, f"{field}.npy"), mmap_mode='r') for field in FIELDS}
+        logger.info(f"Mapped price matrix {path}: {len(index['symbols'])} symbols x {len(dates)} days")
+        return cls(path, index, dates, arrays)
+
+    @property
+    def shape(self):
+        return self.close.shape
+
+    def __contains__(self, symbol):
+        return symbol in self.symbol_index
+
+    # Column of the first trading day at or after ts
+    def date_position(self, ts):
+        return int(np.searchsorted(self.dates, to_unix_ms(ts), side='left'))
+
+    # Column range [lo, hi) covering the trading days from start to end inclusive, either bound optional
+    def date_range(self, start=None, end=None):
+        lo = 0 if start is None else self.date_position(start)
+        hi = len(self.dates) if end is None else int(np.searchsorted(self.dates, to_unix_ms(end), side='right'))
+        return lo, hi
+
+    # All symbols over a day range, as views: {'dates': (days,), 'open'/'close'/'volume': (symbols, days)}
+    def window(self, start=None, end=None):
+        lo, hi = self.date_range(start, end)
+        return {'dates': self.dates[lo:hi], **{field: getattr(self, field)[:, lo:hi] for field in FIELDS}}
+
+    # One symbol from its first to its last trading day, as views:
+    # (dates, open, close, volume); suspended days inside the span are NaN
+    def series(self, symbol):
+        i = self.symbol_index[symbol]
+        lo, hi = self.first[i], self.last[i] + 1
+        return self.dates[lo:hi], self.open[i, lo:hi], self.close[i, lo:hi], self.volume[i, lo:hi]
+
+    # One symbol's candles as the DataFrame layout fetch_historical_data returns, optionally only the
+    # latest `countback` candles; None for an unknown symbol
+    def frame(self, symbol, countback=None):
+        if symbol not in self.symbol_index:
+            return None
+        dates, open_, close, volume = self.series(symbol)
+        traded = ~np.isnan(close)
+        df = pd.DataFrame({
+            'publishDate': pd.to_datetime(dates[traded], unit='ms'),
+            'Open Price': open_[traded],
+            'Close Price': close[traded],
+            'Volume': volume[traded]
+        })
+        return df.tail(countback).reset_index(drop=True) if countback else df
+
+# Build a matrix generation from {symbol: candle DataFrame with publishDate, Open Price, Close Price[, Volume]}
+# and make it current
+def build_price_matrix(frames, matrix_dir=PRICE_MATRIX_DIR):
+    frames = {symbol: df for symbol, df in frames.items() if df is not None and not df.empty}
+    if not frames:
+        logger.error("No candle data to build the price matrix from")
+        return None
+    symbols = list(frames)
+    times = {symbol: df['publishDate'].astype('datetime64[ms]').astype('int64').to_numpy() for symbol, df in frames.items()}
+    dates = np.unique(np.concatenate(list(times.values())))
+
+    arrays = {field: np.full((len(symbols), len(dates)), np.nan) for field in FIELDS}
+    first, last = [], []
+    for i, symbol in enumerate(symbols):
+        df = frames[symbol]
+        columns = np.searchsorted(dates, times[symbol])
+        arrays['open'][i, columns] = df['Open Price'].to_numpy(dtype=float)
+        arrays['close'][i, columns] = df['Close Price'].to_numpy(dtype=float)
+        if 'Volume' in df.columns:
+            arrays['volume'][i, columns] = df['Volume'].to_numpy(dtype=float)
+        first.append(int(columns.min()))
+        last.append(int(columns.max()))
+
+    generation = f"gen-{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
+    path = os.path.join(matrix_dir, generation)
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, 'dates.npy'), dates)
+    for field in FIELDS:
+        np.save(os.path.join(path, f"{field}.npy"), arrays[field])
+    index = {'version': MATRIX_VERSION, 'built_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+             'symbols': symbols, 'first': first, 'last': last}
+    with open(os.path.join(path, 'index.json'), 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+
+    # Switch readers to the new generation, then drop the ones older than the kept previous generations
+    current_file = os.path.join(matrix_dir, CURRENT_FILE)
+    with open(f"{current_file}.tmp", 'w', encoding='utf-8') as f:
+        json.dump({'generation': generation}, f)
+    os.replace(f"{current_file}.tmp", current_file)
+    remove_old_generations(matrix_dir, generation)
+    logger.info(f"Built price matrix {path}: {len(symbols)} symbols x {len(dates)} days")
+    return path
+
+# Delete the generations older than the current one and the KEEP_GENERATIONS before it
+# Generation names sort by build time; one that cannot be deleted is retried by the next rebuild.
+def remove_old_generations(matrix_dir, current, keep=KEEP_GENERATIONS):
+    older = sorted((name for name in os.listdir(matrix_dir) if name.startswith('gen-') and name < current), reverse=True)
+    for name in older[keep:]:
+        try:
+            shutil.rmtree(os.path.join(matrix_dir, name))
+        except OSError as e:
+            logger.warning(f"Could not remove price matrix generation {name} yet: {e}")
+
+# Fetch the full history of every symbol from ShareHub and build a new matrix generation
+def build_from_sharehub(symbols, matrix_dir=PRICE_MATRIX_DIR, max_workers=16):
+    from historical_price_prediction import fetch_historical_data
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        frames = dict(zip(symbols, executor.map(fetch_historical_data, symbols)))
+    missing = [symbol for symbol, df in frames.items() if df is None or df.empty]
+    if missing:
+        logger.warning(f"No candle data for: {', '.join(missing)}")
+    return build_price_matrix(frames, matrix_dir)
+
+if __name__ == "__main__":
+    # Usage: python price_matrix.py [matrix_dir]
+    from historical_price_prediction import SYMBOLS
+    matrix_dir = sys.argv[1] if len(sys.argv) > 1 else PRICE_MATRIX_DIR
+    logger.info(f"Building price matrix at {datetime.now().strftime('%I:%M %p %z on %B %d, %Y')}")
+    build_from_sharehub(SYMBOLS, matrix_dir)
@@ -0,0 +1,167 @@
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+PROFILES_DIR = os.environ.get("SENTIMETRICS_PROFILES_DIR", r"E:\hey\output\profiles")
+SAMPLE_INTERVAL = 0.005  # Seconds between stack samples
+TRACEMALLOC_FRAMES = 1  # The report groups by line; deeper tracebacks multiply tracemalloc's cost
+MODES = ('all', 'cpu', 'memory')
+TOP_ALLOCATIONS = 25
+TOP_FUNCTIONS = 25
+
+# Profiling is off unless enabled, e.g. by --profile on a stage script or main_runner.py; while off,
+# tracked stages only check this flag. Modes: 'cpu' samples stacks (a few percent overhead), 'memory'
+# traces allocations with tracemalloc (expensive for code allocating many small objects, and it slows
+# such code in the CPU profile too), 'all' does both.
+_mode = os.environ.get("SENTIMETRICS_PROFILE") or None
+
+def enable(mode='all'):
+    global _mode
+    if mode not in MODES:
+        raise ValueError(f"Unknown profiling mode {mode}, expected one of {', '.join(MODES)}")
+    _mode = mode
+
+def disable():
+    global _mode
+    _mode = None
+
+def is_enabled():
+    return _mode is not None
+
+# Enable profiling when a stage script was started with --profile[=cpu|memory|all]
+def enable_from_args(argv=None):
+    for arg in (sys.argv if argv is None else argv):
+        if arg == "--profile" or arg.startswith("--profile="):
+            enable(arg.partition('=')[2] or 'all')
+    return is_enabled()
+
+# Frame stack of a thread as "file:function" entries, outermost first
+def _stack(frame):
+    entries = []
+    while frame is not None:
+        code = frame.f_code
+        entries.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return entries[::-1]
+
+# Sampling CPU profiler: a background thread records the stack of every other thread every
+# SAMPLE_INTERVAL seconds. Samples are kept as collapsed stacks (thread;outer;...;inner -> count), the
+# input format of flamegraph.pl, speedscope and similar viewers. Worker threads a stage starts are
+# sampled too and appear under their own thread name.
+class StackSampler:
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.samples = Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                # Idle pool workers waiting for work are noise, not cost
+                stack = _stack(frame)
+                if stack and stack[-1] == "thread.py:_worker":
+                    continue
+                self.samples[";".join([names.get(ident, str(ident))] + stack)] += 1
+            self.sample_count += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True, name="profiling-sampler")
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    # Samples per function, counting a function once per sample (self = innermost frame only)
+    def top_functions(self, n=TOP_FUNCTIONS):
+        total, own = Counter(), Counter()
+        for stack, count in self.samples.items():
+            frames = stack.split(';')[1:]
+            for function in set(frames):
+                total[function] += count
+            if frames:
+                own[frames[-1]] += count
+        return [(function, own[function], count) for function, count in total.most_common(n)]
+
+# A stage's profile: a stack sampler and/or tracemalloc over the stage's run
+class StageProfile:
+    def __init__(self, stage, mode='all', profiles_dir=None):
+        self.stage = stage
+        self.profiles_dir = profiles_dir or PROFILES_DIR
+        self.sampler = StackSampler() if mode in ('all', 'cpu') else None
+        self.trace_memory = mode in ('all', 'memory')
+        self._started_tracemalloc = False
+
+    def start(self):
+        self.started_at = datetime.now()
+        self.start_time = time.perf_counter()
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+                self._started_tracemalloc = True
+            tracemalloc.reset_peak()
+        if self.sampler:
+            self.sampler.start()
+        return self
+
+    # Stop profiling and write <stage>-<time>.txt (and .collapsed when sampling); returns the report path
+    def stop(self):
+        if self.sampler:
+            self.sampler.stop()
+        wall = time.perf_counter() - self.start_time
+        snapshot = None
+        if self.trace_memory:
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>")])
+            current, peak = tracemalloc.get_traced_memory()
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+
+        try:
+            os.makedirs(self.profiles_dir, exist_ok=True)
+            base = os.path.join(self.profiles_dir, f"{self.stage}-{self.started_at.strftime('%Y%m%d%H%M%S')}")
+            lines = [f"Profile of stage {self.stage} started {self.started_at.strftime('%Y-%m-%d %H:%M:%S')}",
+                     f"Wall time {wall:.2f}s"]
+            if self.sampler:
+                with open(f"{base}.collapsed", 'w', encoding='utf-8') as f:
+                    for stack, count in self.sampler.samples.most_common():
+                        f.write(f"{stack} {count}\n")
+                lines += ["", f"Top functions by samples ({self.sampler.sample_count} samples every "
+                              f"{self.sampler.interval * 1000:.0f}ms; self / total, all threads):"]
+                for function, own, total in self.sampler.top_functions():
+                    lines.append(f"{own:>8} {total:>8}  {function}")
+            if snapshot is not None:
+                lines += ["", f"Traced memory at end {current / 2 ** 20:.1f} MiB, peak {peak / 2 ** 20:.1f} MiB",
+                          "Top allocations live at the end of the stage (by line):"]
+                for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]:
+                    frame = stat.traceback[0]
+                    lines.append(f"{stat.size / 2 ** 20:>8.2f} MiB {stat.count:>9} blocks  {frame.filename}:{frame.lineno}")
+            with open(f"{base}.txt", 'w', encoding='utf-8') as f:
+                f.write("\n".join(lines) + "\n")
+            logger.info(f"Wrote profile of {self.stage} to {base}.txt" + (f" and {base}.collapsed" if self.sampler else ""))
+            return f"{base}.txt"
+        except Exception as e:
+            logger.error(f"Error writing profile of {self.stage}: {e}")
+            return None
+
+# Start profiling a stage when profiling is enabled; None (and no work at all) when it is off
+def start_stage(stage, profiles_dir=None):
+    if _mode is None:
+        return None
+    return StageProfile(stage, _mode, profiles_dir).start()
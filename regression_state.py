@@ -0,0 +1,143 @@
+import json
+import logging
+import math
+import os
+import sys
+from collections import deque
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+STATE_VERSION = 1
+MODELS = ('open', 'close')  # Index 0 is the open model, index 1 the close model
+CHANGE_WINDOW = 5  # Number of recent price changes used for confidence
+
+# Create an empty per-symbol regression state
+# The state keeps decayed, centered running moments (weight, means, co-moments) for the open and close
+# single-feature regressions, which are equivalent to the raw sums but stay numerically stable
+def new_model_state(window=5, decay=1.0):
+    return {
+        'version': STATE_VERSION,
+        'window': window,
+        'decay': decay,
+        'last_time': None,          # Unix ms of the last candle applied
+        'candles': 0,               # Number of candles applied
+        'prices': [],               # Last `window` (open, close) pairs, for the rolling MA
+        'last_ma': None,            # MA of the last candle, the feature paired with the next price
+        'changes': [],              # Last CHANGE_WINDOW (open, close) price changes
+        'weight': [0.0, 0.0],
+        'mean_x': [0.0, 0.0],
+        'mean_y': [0.0, 0.0],
+        'c_xx': [0.0, 0.0],
+        'c_xy': [0.0, 0.0]
+    }
+
+# Add one (feature, target) sample to a model, decaying older samples first
+def _add_sample(state, model, x, y):
+    decay = state['decay']
+    weight = decay * state['weight'][model] + 1.0
+    dx = x - state['mean_x'][model]
+    dy = y - state['mean_y'][model]
+    mean_x = state['mean_x'][model] + dx / weight
+    mean_y = state['mean_y'][model] + dy / weight
+    state['c_xx'][model] = decay * state['c_xx'][model] + dx * (x - mean_x)
+    state['c_xy'][model] = decay * state['c_xy'][model] + dx * (y - mean_y)
+    state['weight'][model] = weight
+    state['mean_x'][model] = mean_x
+    state['mean_y'][model] = mean_y
+
+# Apply one new daily candle to the state in O(1)
+def update_model_state(state, timestamp, open_price, close_price):
+    if state['last_time'] is not None and timestamp <= state['last_time']:
+        return state  # Candle already applied
+    if open_price is None or close_price is None or math.isnan(open_price) or math.isnan(close_price):
+        logger.warning(f"Skipping candle at {timestamp} with missing prices")
+        return state
+
+    window = state['window']
+    prices = deque(state['prices'], maxlen=window)
+    current = (float(open_price), float(close_price))
+
+    # The previous MA is the feature for today's prices
+    if state['last_ma'] is not None:
+        for model in range(len(MODELS)):
+            _add_sample(state, model, state['last_ma'][model], current[model])
+
+    # Track the price change once the row would survive the batch model's NaN filtering
+    previous = prices[-1] if prices else None
+    prices.append(current)
+    if previous is not None and len(prices) == window:
+        changes = deque(state['changes'], maxlen=CHANGE_WINDOW)
+        changes.append(tuple(
+            (current[m] / previous[m] - 1.0) if previous[m] else math.nan for m in range(len(MODELS))))
+        state['changes'] = [list(change) for change in changes]
+        state['last_ma'] = [sum(p[m] for p in prices) / window for m in range(len(MODELS))]
+
+    state['prices'] = [list(p) for p in prices]
+    state['last_time'] = int(timestamp)
+    state['candles'] += 1
+    return state
+
+# Apply a sequence of (timestamp, open, close) candles in chronological order
+def apply_candles(state, candles):
+    for timestamp, open_price, close_price in candles:
+        update_model_state(state, timestamp, open_price, close_price)
+    return state
+
+# Sample standard deviation, NaN for fewer than two values
+def _sample_std(values):
+    if len(values) < 2:
+        return math.nan
+    mean = sum(values) / len(values)
+    return math.sqrt(sum((v - mean) ** 2 for v in values) / (len(values) - 1))
+
+# Predict open, close, average and confidence from the state in constant time
+def predict_from_state(state):
+    if state is None or state['last_ma'] is None or min(state['weight']) <= 0:
+        return None, None, None, 0.0
+
+    predicted = []
+    for model in range(len(MODELS)):
+        mean_x = state['mean_x'][model]
+        c_xx = state['c_xx'][model]
+        # A constant feature has no usable slope; fall back to the mean target
+        if c_xx > sys.float_info.epsilon * (state['weight'][model] * mean_x * mean_x + c_xx):
+            slope = state['c_xy'][model] / c_xx
+        else:
+            slope = 0.0
+        intercept = state['mean_y'][model] - slope * mean_x
+        predicted.append(intercept + slope * state['last_ma'][model])
+    predicted_open, predicted_close = predicted
+    predicted_average = (predicted_open + predicted_close) / 2
+
+    # Confidence based on recent trend stability
+    recent_open_changes = _sample_std([change[0] for change in state['changes']])
+    recent_close_changes = _sample_std([change[1] for change in state['changes']])
+    confidence = max(0.0, min(1.0, 1.0 - (recent_open_changes + recent_close_changes) / 2))  # Average stability
+
+    return predicted_open, predicted_close, predicted_average, confidence
+
+# Load persisted per-symbol states, dropping entries written by another state version
+def load_model_states(state_file):
+    try:
+        if os.path.exists(state_file):
+            with open(state_file, 'r', encoding='utf-8') as f:
+                states = json.load(f)
+            states = {symbol: state for symbol, state in states.items() if state.get('version') == STATE_VERSION}
+            logger.info(f"Loaded regression state for {len(states)} symbols from {state_file}")
+            return states
+        logger.warning(f"Regression state file {state_file} not found, models will be built from full history")
+        return {}
+    except Exception as e:
+        logger.error(f"Error loading regression state: {e}")
+        return {}
+
+# Persist per-symbol states atomically so a crash never leaves a half-written file
+def save_model_states(states, state_file):
+    os.makedirs(os.path.dirname(state_file) or '.', exist_ok=True)
+    tmp_file = f"{state_file}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(states, f)
+    os.replace(tmp_file, state_file)
+    logger.info(f"Saved regression state for {len(states)} symbols to {state_file}")
@@ -6,10 +6,18 @@ import logging
 import os
 import time
 import datetime
+import storage
+import dedupe
+from metrics import track_stage, record_rows
+import profiling
+from logging_setup import setup_logging, ItemLog
+from sentiment_store import upsert_sentiment, load_sentiment_store, recent_cluster_scores
 
-# Set up logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# Set up logging through the shared logging queue
+setup_logging()
 logger = logging.getLogger(__name__)
+# Per-article scores are rate-limited DEBUG lines, with a periodic INFO summary by polarity
+score_log = ItemLog(logger, "Scored articles")
 
 # Download VADER lexicon (run once)
 nltk.download('vader_lexicon', quiet=True)
@@ -26,74 +34,112 @@ def normalize_text(text):
         logger.error(f"Text normalization failed: {e}")
         return ""
 
-# Function to analyze sentiment and assign numerical score
+# Analyze sentiment of English text with VADER
+def english_polarity(text):
+    polarity = sid.polarity_scores(text)['compound']  # -1.0 (most negative) to 1.0 (most positive)
+    score_log.record("positive" if polarity > 0 else "negative" if polarity < 0 else "neutral",
+                     "Text: '%.50s...' | Polarity: %s", text, polarity)
+    return polarity
+
+# Function to analyze sentiment and assign numerical score; None when the text could not be translated
 def analyze_sentiment(title, summary):
+    if not title and not summary:
+        logger.warning("Empty title and summary provided")
+        return 0.0
+    return score_text(f"{title} {summary}")
+
+# Function to score an already combined "title summary" text, e.g. the content classify_news_item matched on
+# Text detected as English (language 'en') is scored as it is, without spending a translation.
+# Returns None when the translation failed (no result after the retries, or an empty one), so callers can
+# leave the article unscored and retry it later instead of storing a failure as a neutral 0.0.
+def score_text(text, language=None):
+    combined_text = ""
     try:
-        if not title and not summary:
-            logger.warning("Empty title and summary provided")
-            return 0.0
-        combined_text = normalize_text(f"{title} {summary}")
+        combined_text = normalize_text(text)
         if not combined_text:
             logger.warning("Combined text is empty after normalization")
             return 0.0
-        
+        if language == 'en':
+            return english_polarity(combined_text)
+
         # Retry translation up to 3 times
         for attempt in range(3):
             try:
                 translated = translator.translate(combined_text)
                 if translated is None or not translated.strip():
                     logger.warning(f"Translation returned empty for text: {combined_text[:50]}...")
-                    return 0.0
-                # Analyze sentiment with VADER
-                scores = sid.polarity_scores(translated)
-                polarity = scores['compound']  # -1.0 (most negative) to 1.0 (most positive)
-                logger.info(f"Text: '{translated[:50]}...' | Polarity: {polarity}")
-                return polarity
+                    return None
+                return english_polarity(translated)
             except Exception as e:
                 logger.warning(f"Translation attempt {attempt + 1} failed: {e}")
                 time.sleep(1)  # Wait before retrying
         logger.error(f"All translation attempts failed for text: {combined_text[:50]}...")
-        return 0.0
+        return None
     except Exception as e:
         logger.error(f"Sentiment analysis failed for text '{combined_text[:50]}...': {e}")
-        return 0.0
+        return None
 
-# Function to process news files and generate sentiment results
-def process_news_files(input_dir, output_dir):
-    os.makedirs(output_dir, exist_ok=True)
-    for filename in os.listdir(input_dir):
-        if filename.endswith(".csv"):
-            file_path = os.path.join(input_dir, filename)
-            try:
-                # Read CSV with robust error handling
-                df = pd.read_csv(file_path, encoding="utf-8-sig", on_bad_lines='skip')
-                if df.empty:
-                    logger.info(f"No data in {file_path}")
-                    continue
+# Function to score the stored news and save sentiment results
+# News is read from the storage layer's `news` table and every symbol's sentiment is upserted into the
+# sentiment table, which is returned so an in-process caller can use it without re-reading.
+# When export_dir is given the legacy per-symbol `{symbol}_share_sentiment.csv` files are exported there too.
+# Only articles without a sentiment row yet are scored, and copies of one story from several outlets
+# (see dedupe.py) are translated and scored once: a story scored before keeps its stored score.
+# Stories whose translation failed get no sentiment rows, so the next run scores them again.
+@track_stage("sentiment")
+def process_news_files(export_dir=None, root=None):
+    scored_ids = set(storage.read("sentiment", columns=['articleId'], root=root)['articleId'])
+    ids = storage.read("news", columns=['symbol', 'articleId'], root=root)
+    new_ids = ids[~ids['articleId'].isin(scored_ids)]
+    if new_ids.empty:
+        logger.info("No new news in the store to score")
+        if export_dir:
+            storage.export_csv("sentiment", export_dir, suffix="_share_sentiment.csv", root=root)
+        return load_sentiment_store(root=root)
+    news = storage.read("news", symbols=list(new_ids['symbol'].dropna().unique()), root=root)
+    news = news[news['articleId'].isin(set(new_ids['articleId']))].drop_duplicates(['symbol', 'articleId'], keep='last')
 
-                # Ensure required columns exist with fallback
-                required_columns = ['articleId', 'publishedDate', 'mediaUrl', 'matchedCompany', 'title', 'summary']
-                for col in required_columns:
-                    if col not in df.columns:
-                        df[col] = ['N/A'] * len(df)
-                    df[col] = df[col].fillna('N/A')
+    # Fill missing text with the placeholder the scoring has always seen
+    news = news.astype({'title': object, 'summary': object}).fillna({'title': 'N/A', 'summary': 'N/A'})
 
-                # Analyze sentiment based on title and summary
-                df['sentiment_score'] = df.apply(lambda row: analyze_sentiment(row['title'], row['summary']), axis=1)
+    # Match the new articles against the recent stories, then translate and score one representative
+    # (the earliest copy) per story that has no score yet
+    news['clusterId'] = dedupe.assign_clusters(news, dedupe.recent_index(root=root))
+    cluster_scores = recent_cluster_scores(dedupe.recent_start(), root=root)
+    unscored = news[~news['clusterId'].isin(cluster_scores.keys())]
+    representatives = unscored.sort_values('publishedDate', kind='stable').drop_duplicates('clusterId')
+    logger.info(f"Scoring {len(representatives)} new stories for {len(news)} new articles")
+    failed = 0
+    for cluster_id, title, summary in zip(representatives['clusterId'], representatives['title'], representatives['summary']):
+        score = analyze_sentiment(title, summary)
+        if score is None:
+            failed += 1
+        else:
+            cluster_scores[cluster_id] = score
+    if failed:
+        logger.warning(f"{failed} stories could not be translated and are left unscored until the next run")
+    scored = news[news['clusterId'].isin(cluster_scores.keys())]
 
-                # Select relevant columns for output
-                sentiment_df = df[['articleId', 'matchedCompany', 'publishedDate', 'mediaUrl', 'sentiment_score']]
+    store_rows = []
+    for symbol, df in scored.groupby('symbol', sort=False):
+        try:
+            # Every copy gets its story's score, and keeps its own mediaUrl for the per-domain weightage
+            df = df.assign(sentiment_score=df['clusterId'].map(cluster_scores))
+            store_rows.append(df[['symbol', 'articleId', 'matchedCompany', 'publishedDate', 'mediaUrl', 'sentiment_score', 'clusterId']])
+            logger.info(f"Generated sentiment results for {symbol} with {len(df)} articles")
+        except Exception as e:
+            logger.error(f"Error processing news for {symbol}: {e}")
 
-                # Save to share_sentiment.csv
-                sharename = os.path.splitext(filename)[0].replace("_news", "")
-                output_file = os.path.join(output_dir, f"{sharename}_share_sentiment.csv")
-                sentiment_df.to_csv(output_file, index=False, encoding="utf-8-sig")
-                logger.info(f"Generated sentiment results to {output_file} with {len(sentiment_df)} articles")
-            except Exception as e:
-                logger.error(f"Error processing {file_path}: {e}")
+    score_log.flush()
+    record_rows(rows_in=len(news), rows_out=sum(len(rows) for rows in store_rows))
+    if store_rows:
+        upsert_sentiment(pd.concat(store_rows, ignore_index=True), root=root)
+    if export_dir:
+        storage.export_csv("sentiment", export_dir, suffix="_share_sentiment.csv", root=root)
+    return load_sentiment_store(root=root)
 
 if __name__ == "__main__":
-    input_dir = r"E:\hey\output\news_data"
-    output_dir = r"E:\hey\output\sentiment_results"
+    profiling.enable_from_args()  # --profile[=cpu|memory] writes a CPU and memory profile of the run
+    export_dir = r"E:\hey\output\sentiment_results"
     logger.info(f"Starting news processing at {datetime.now().strftime('%I:%M %p %z on %B %d, %Y')}")
-    process_news_files(input_dir, output_dir)
\ No newline at end of file
+    process_news_files(export_dir)
\ No newline at end of file
@@ -0,0 +1,53 @@
+import pandas as pd
+import logging
+import storage
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Consolidated sentiment for every symbol lives in the storage layer's `sentiment` table,
+# one partition per symbol kept sorted by publishedDate
+SENTIMENT_TABLE = "sentiment"
+
+def sentiment_store_exists(root=None):
+    return storage.table_exists(SENTIMENT_TABLE, root)
+
+# Read the store, optionally only for some symbols and a publishedDate range
+def load_sentiment_store(symbols=None, start=None, end=None, root=None):
+    return storage.read(SENTIMENT_TABLE, symbols=symbols, start=start, end=end, root=root)
+
+# Insert or replace sentiment rows, keyed by (symbol, articleId); a re-scored article replaces its old row
+def upsert_sentiment(df, root=None):
+    if df.empty:
+        return
+    df = df.assign(sentiment_score=pd.to_numeric(df['sentiment_score'], errors='coerce').fillna(0.0))
+    storage.upsert(SENTIMENT_TABLE, df, keys=['symbol', 'articleId'], sort_by='publishedDate', root=root)
+
+# clusterId -> sentiment_score of the stories scored for articles published since start, so copies of a
+# story published since are not scored again
+def recent_cluster_scores(start=None, root=None):
+    scored = storage.read(SENTIMENT_TABLE, start=start, columns=['clusterId', 'sentiment_score'], root=root).dropna(subset=['clusterId'])
+    return dict(zip(scored['clusterId'], scored['sentiment_score']))
+
+# Latest sentiment for the whole universe: for every symbol the rows published on its most
+# recent date whose articleId mentions the symbol, in store order
+def latest_sentiment_frame(root=None):
+    latest = select_latest_sentiment(load_sentiment_store(root=root))
+    logger.info(f"Loaded latest sentiment for {latest['symbol'].nunique()} symbols from the sentiment store")
+    return latest
+
+# Latest-sentiment selection over an in-memory store table
+def select_latest_sentiment(store):
+    if store.empty:
+        return store
+    latest_date = store.groupby('symbol')['publishedDate'].transform('max')
+    latest = store[store['publishedDate'] == latest_date]
+    # Same article filter the per-symbol loop applied, evaluated once per row
+    mentions = [isinstance(article_id, str) and symbol in article_id for symbol, article_id in zip(latest['symbol'], latest['articleId'])]
+    return latest[mentions]
+
+# Latest sentiment as {symbol: DataFrame}, for callers that adjust one symbol at a time
+def latest_sentiment(root=None):
+    latest = latest_sentiment_frame(root)
+    return {symbol: rows for symbol, rows in latest.groupby('symbol', sort=False)}
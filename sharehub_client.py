@@ -0,0 +1,222 @@
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Base URL and cache directory can be overridden, e.g. to point the pipeline at a local stub server
+BASE_URL = os.environ.get("SHAREHUB_BASE_URL", "https://sharehubnepal.com")
+CACHE_DIR = os.environ.get("SHAREHUB_CACHE_DIR", r"E:\hey\output\cache\sharehub")
+
+NEWS_PATH = "/account/api/v1/khula-manch/post"
+CANDLE_PATH = "/data/api/v1/candle-chart/history"
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # Seconds, upper bounds of the histogram
+
+# Response returned by the client, whether it came from the network or the disk cache
+class ShareHubResponse:
+    def __init__(self, status_code, text, from_cache=False):
+        self.status_code = status_code
+        self.text = text
+        self.from_cache = from_cache
+
+    def json(self):
+        return json.loads(self.text)
+
+# Additive-increase / multiplicative-decrease limit on concurrent requests
+# The limit grows by one after `increase_after` clean responses and halves when the server throttles or fails
+class AdaptiveLimiter:
+    def __init__(self, initial=4, minimum=1, maximum=16, increase_after=20):
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase_after = increase_after
+        self._in_flight = 0
+        self._successes = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while self._in_flight >= self.limit:
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self, throttled=False):
+        with self._condition:
+            self._in_flight -= 1
+            if throttled:
+                self.limit = max(self.minimum, self.limit // 2)
+                self._successes = 0
+                logger.warning(f"ShareHub throttling detected, concurrency limit lowered to {self.limit}")
+            else:
+                self._successes += 1
+                if self._successes >= self.increase_after and self.limit < self.maximum:
+                    self.limit += 1
+                    self._successes = 0
+            self._condition.notify_all()
+
+# Thread-safe request counters and latency histograms per endpoint
+class RequestMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints = {}
+
+    def _endpoint(self, path):
+        if path not in self.endpoints:
+            self.endpoints[path] = {'requests': 0, 'errors': 0, 'retries': 0, 'throttled': 0, 'cache_hits': 0,
+                                    'not_modified': 0, 'latency_sum': 0.0, 'latency_buckets': [0] * (len(LATENCY_BUCKETS) + 1)}
+        return self.endpoints[path]
+
+    def record(self, path, field, amount=1):
+        with self._lock:
+            self._endpoint(path)[field] += amount
+
+    def observe_latency(self, path, seconds):
+        with self._lock:
+            stats = self._endpoint(path)
+            stats['requests'] += 1
+            stats['latency_sum'] += seconds
+            bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS) if seconds <= bound), len(LATENCY_BUCKETS))
+            stats['latency_buckets'][bucket] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return json.loads(json.dumps(self.endpoints))
+
+# Disk cache of JSON responses keyed by URL and parameters, with TTL and ETag/Last-Modified validators
+class ResponseCache:
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def _path(self, url, params):
+        key = hashlib.sha256(f"{url}?{json.dumps(params, sort_keys=True)}".encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, url, params):
+        path = self._path(url, params)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, url, params, text, etag=None, last_modified=None):
+        path = self._path(url, params)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {'url': url, 'params': params, 'fetched_at': time.time(), 'etag': etag,
+                 'last_modified': last_modified, 'text': text}
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+        return entry
+
+    def touch(self, url, params, entry):
+        return self.put(url, params, entry['text'], entry.get('etag'), entry.get('last_modified'))
+
+# Shared ShareHub API client: pooled session, adaptive concurrency, exponential backoff, disk cache, metrics
+class ShareHubClient:
+    def __init__(self, base_url=BASE_URL, cache_dir=CACHE_DIR, pool_size=32, max_retries=4, backoff_base=0.5,
+                 backoff_max=30.0, timeout=10, limiter=None):
+        self.base_url = base_url.rstrip('/')
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.limiter = limiter or AdaptiveLimiter()
+        self.metrics = RequestMetrics()
+        self.cache = ResponseCache(cache_dir) if cache_dir else None
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    # Delay before retry `attempt` (0-based): the server's Retry-After when given, else capped exponential with jitter
+    def _backoff(self, attempt, retry_after=None):
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return min(self.backoff_max, self.backoff_base * (2 ** attempt)) * random.uniform(0.5, 1.0)
+
+    # GET a JSON endpoint. With ttl (seconds) a cached response younger than ttl is returned without a request;
+    # an older one is revalidated with its ETag/Last-Modified and reused on 304 Not Modified.
+    def get(self, path, params=None, ttl=None, max_retries=None):
+        max_retries = self.max_retries if max_retries is None else max_retries
+        url = f"{self.base_url}{path}"
+        params = dict(params or {})
+        cached = self.cache.get(url, params) if self.cache and ttl is not None else None
+        if cached and time.time() - cached['fetched_at'] < ttl:
+            self.metrics.record(path, 'cache_hits')
+            return ShareHubResponse(200, cached['text'], from_cache=True)
+
+        headers = {}
+        if cached and cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached and cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+
+        # Backs off between attempts only; the last failed attempt returns (or raises) right away
+        last_error = None
+        for attempt in range(max_retries + 1):
+            if attempt:
+                self.metrics.record(path, 'retries')
+            self.limiter.acquire()
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+            except requests.RequestException as e:
+                self.metrics.observe_latency(path, time.perf_counter() - start)
+                self.limiter.release(throttled=True)
+                self.metrics.record(path, 'errors')
+                logger.warning(f"ShareHub request to {path} failed (attempt {attempt + 1}): {e}")
+                last_error = e
+                if attempt < max_retries:
+                    time.sleep(self._backoff(attempt))
+                continue
+
+            self.metrics.observe_latency(path, time.perf_counter() - start)
+            throttled = response.status_code in RETRY_STATUSES
+            self.limiter.release(throttled=throttled)
+            if response.status_code == 304 and cached:
+                self.metrics.record(path, 'not_modified')
+                self.cache.touch(url, params, cached)
+                return ShareHubResponse(200, cached['text'], from_cache=True)
+            if throttled:
+                self.metrics.record(path, 'throttled' if response.status_code == 429 else 'errors')
+                logger.warning(f"ShareHub {path} returned {response.status_code} (attempt {attempt + 1}), backing off")
+                if attempt < max_retries:
+                    time.sleep(self._backoff(attempt, response.headers.get('Retry-After')))
+                last_error = response
+                continue
+            if response.status_code == 200 and self.cache and ttl is not None:
+                self.cache.put(url, params, response.text, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+            elif response.status_code != 200:
+                self.metrics.record(path, 'errors')
+            return ShareHubResponse(response.status_code, response.text)
+
+        logger.error(f"ShareHub {path} failed after {max_retries + 1} attempts")
+        if isinstance(last_error, requests.Response):
+            return ShareHubResponse(last_error.status_code, last_error.text)
+        raise last_error
+
+_client = None
+_client_lock = threading.Lock()
+
+# Process-wide client shared by every stage
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = ShareHubClient()
+        return _client
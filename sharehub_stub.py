@@ -0,0 +1,261 @@
+import argparse
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from sharehub_client import NEWS_PATH, CANDLE_PATH
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+STATS_PATH = "/stub/stats"
+MEDIA_DOMAINS = ["https://www.sharesansar.com", "https://merolagani.com", "https://arthasarokar.com",
+                 "https://www.bizshala.com", "https://ekantipur.com", "https://kathmandupost.com"]
+
+# Headline and summary templates; {name} is a Nepali or English company name
+NEPALI_TEMPLATES = [
+    ("{name}ले {pct}% लाभांश घोषणा गर्‍यो", "{name}को सञ्चालक समितिको बैठकले शेयरधनीलाई {pct}% लाभांश दिने निर्णय गरेको छ।"),
+    ("{name}को खुद नाफा {pct}% ले बढ्यो", "चालु आर्थिक वर्षको त्रैमासिकमा {name}को खुद नाफा {pct}% ले वृद्धि भएको छ।"),
+    ("{name}को नाफा {pct}% ले घट्यो", "{name}को त्रैमासिक वित्तीय विवरण अनुसार नाफा {pct}% ले घटेको छ।"),
+    ("{name}को साधारण सभा बस्दै", "{name}ले आगामी साधारण सभाको मिति तय गरेको छ।"),
+    ("{name}ले हकप्रद शेयर जारी गर्ने", "{name}ले {pct} प्रतिशत हकप्रद शेयर जारी गर्ने प्रस्ताव पारित गरेको छ।")
+]
+ENGLISH_TEMPLATES = [
+    ("{name} announces {pct}% dividend", "The board of {name} has proposed a {pct}% dividend for shareholders."),
+    ("{name} net profit up {pct}%", "{name} reported a {pct}% rise in quarterly net profit."),
+    ("{name} profit falls {pct}%", "Quarterly results show {name}'s profit declining by {pct}%."),
+    ("{name} to hold annual general meeting", "{name} has fixed the date of its upcoming AGM.")
+]
+NOISE_TEMPLATES = [
+    ("नेप्से परिसूचक {pct} अंकले बढ्यो", "आज कारोबार भएको शेयर बजारमा नेप्से परिसूचक बढेको छ।"),
+    ("Market turnover crosses Rs {pct} billion", "Trading activity picked up across sectors today.")
+]
+
+# Synthetic ShareHub data: articles mentioning companies from companies.json and daily candles
+# for every symbol, generated deterministically from a seed. A duplicate_share of the articles are
+# another outlet's lightly edited copy of a story published around the same time.
+class SyntheticData:
+    def __init__(self, articles=5000, days=750, seed=42, noise_share=0.2, english_share=0.3, duplicate_share=0.15):
+        import company_data
+        nepse_data, nepali_translations = company_data.nepse_data(), company_data.translations()
+        rng = random.Random(seed)
+        np_rng = np.random.default_rng(seed)
+
+        # Daily candles on weekdays ending today, as a geometric random walk per symbol
+        end = pd.Timestamp(datetime.now(timezone.utc).date())
+        self.dates = pd.bdate_range(end=end, periods=days)
+        self.times = (self.dates.values.astype('datetime64[ms]').astype('int64'))
+        self.candles = {}
+        for symbol in dict.fromkeys(nepse_data['Symbol']):
+            start = np_rng.uniform(100, 1500)
+            returns = np_rng.normal(0.0002, 0.018, days)
+            close = start * np.exp(np.cumsum(returns))
+            open_ = close * np.exp(np_rng.normal(0, 0.006, days))
+            high = np.maximum(open_, close) * (1 + np.abs(np_rng.normal(0, 0.006, days)))
+            low = np.minimum(open_, close) * (1 - np.abs(np_rng.normal(0, 0.006, days)))
+            volume = np_rng.integers(500, 200000, days)
+            self.candles[symbol] = np.column_stack([open_, high, low, close, volume]).round(2)
+
+        # Articles, newest first with descending ids, published across the candle history
+        companies = list(nepali_translations.items())
+        start_ts = self.dates[0].timestamp()
+        span = datetime.now(timezone.utc).timestamp() - start_ts
+        published = sorted((start_ts + rng.random() * span for _ in range(articles)), reverse=True)
+        self.articles = []
+        for i, ts in enumerate(published):
+            pct = rng.randint(2, 40)
+            article_id = articles - i
+            if i and rng.random() < duplicate_share:
+                original = self.articles[-rng.randint(1, min(i, 5))]
+                self.articles.append({
+                    "id": article_id,
+                    "title": original['title'],
+                    "summary": original['summary'].rstrip('।.') + rng.choice([" हो।", " छ।", ".", ""]),
+                    "publishedDate": datetime.fromtimestamp(ts, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+                    "mediaUrl": f"{rng.choice(MEDIA_DOMAINS)}/news/{article_id}",
+                    "mediaType": "News"
+                })
+                continue
+            if rng.random() < noise_share:
+                title, summary = rng.choice(NOISE_TEMPLATES)
+                name = ""
+            elif rng.random() < english_share:
+                title, summary = rng.choice(ENGLISH_TEMPLATES)
+                name = rng.choice(companies)[0]
+            else:
+                title, summary = rng.choice(NEPALI_TEMPLATES)
+                name = rng.choice(rng.choice(companies)[1])
+            self.articles.append({
+                "id": article_id,
+                "title": title.format(name=name, pct=pct),
+                "summary": summary.format(name=name, pct=pct),
+                "publishedDate": datetime.fromtimestamp(ts, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+                "mediaUrl": f"{rng.choice(MEDIA_DOMAINS)}/news/{article_id}",
+                "mediaType": "News"
+            })
+        self.article_ids = np.array([article['id'] for article in self.articles])
+        logger.info(f"Generated {len(self.articles)} articles and {days} days of candles for {len(self.candles)} symbols")
+
+    # One page of the khula-manch feed: `size` articles older than last_post_id (newest first)
+    def news_page(self, last_post_id=None, size=20):
+        start = 0
+        if last_post_id:
+            # Ids descend, so the first article older than last_post_id is found by bisection on the negated ids
+            start = int(np.searchsorted(-self.article_ids, -int(last_post_id), side='right'))
+        return self.articles[start:start + size]
+
+    # Candle history of a symbol, oldest first, optionally only the latest `countback` days
+    def candle_history(self, symbol, countback=None):
+        values = self.candles.get(symbol)
+        if values is None:
+            return []
+        times = self.times
+        if countback:
+            values, times = values[-countback:], times[-countback:]
+        return [{"time": int(t), "open": o, "high": h, "low": l, "close": c, "volume": int(v)}
+                for t, (o, h, l, c, v) in zip(times.tolist(), values.tolist())]
+
+# Latency and failure injection applied to every request
+class FaultInjector:
+    def __init__(self, latency_ms=0, jitter_ms=0, error_rate=0.0, throttle_rate=0.0, retry_after=1, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    # Sleep for the injected latency and return an injected status code, or None to serve normally
+    def apply(self):
+        with self._lock:
+            delay = max(0.0, self.latency_ms + self.rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            roll = self.rng.random()
+        time.sleep(delay)
+        if roll < self.throttle_rate:
+            return 429
+        if roll < self.throttle_rate + self.error_rate:
+            return 503
+        return None
+
+# Request counters per path and status, served at /stub/stats
+class StubStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.counts = {}
+
+    def record(self, path, status):
+        with self._lock:
+            key = f"{path} {status}"
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            total = sum(self.counts.values())
+            elapsed = time.time() - self.started
+            return {'requests': total, 'requests_per_second': total / elapsed if elapsed else 0.0, 'by_path_status': dict(self.counts)}
+
+# HTTP endpoints mirroring ShareHub:
+#   GET /account/api/v1/khula-manch/post?MediaType=News&Size=N[&LastPostId=ID]
+#   GET /data/api/v1/candle-chart/history?symbol=S&resolution=1D[&countback=N]
+#   GET /stub/stats                                   request counts of the stub itself
+# Responses carry an ETag and honour If-None-Match, so the client's revalidation path is exercised too.
+class ShareHubStubHandler(BaseHTTPRequestHandler):
+    data = None
+    faults = None
+    stats = None
+    protocol_version = 'HTTP/1.1'  # Keep-alive, as the real server, so the client's connection pool is used
+
+    def _send(self, status, payload=None, headers=None):
+        body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.stats.record(urlparse(self.path).path, status)
+
+    def _send_json(self, payload):
+        etag = '"' + hashlib.sha1(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest() + '"'
+        if self.headers.get('If-None-Match') == etag:
+            self._send(304, headers={'ETag': etag})
+        else:
+            self._send(200, payload, headers={'ETag': etag})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if url.path == STATS_PATH:
+            self._send(200, self.stats.snapshot())
+            return
+
+        injected = self.faults.apply()
+        if injected == 429:
+            self._send(429, {'success': False, 'message': 'Too many requests'}, headers={'Retry-After': str(self.faults.retry_after)})
+            return
+        if injected:
+            self._send(injected, {'success': False, 'message': 'Injected failure'})
+            return
+
+        if url.path == NEWS_PATH:
+            size = int(params.get('Size', 20))
+            self._send_json({'success': True, 'message': 'ok', 'data': self.data.news_page(params.get('LastPostId'), size)})
+        elif url.path == CANDLE_PATH:
+            countback = int(params['countback']) if params.get('countback') else None
+            candles = self.data.candle_history(params.get('symbol', ''), countback)
+            if candles:
+                self._send_json({'success': True, 'message': 'ok', 'data': candles})
+            else:
+                self._send_json({'success': False, 'message': f"No data for {params.get('symbol')}", 'data': []})
+        else:
+            self._send(404, {'success': False, 'message': 'Unknown endpoint'})
+
+    # Keep per-request access logs out of the output
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+# Serve synthetic data until interrupted (or return the server when block=False, e.g. for a load-test script)
+def serve_stub(data, faults=None, host='127.0.0.1', port=8900, block=True):
+    stats = StubStats()
+    handler = type('BoundShareHubStubHandler', (ShareHubStubHandler,),
+                   {'data': data, 'faults': faults or FaultInjector(), 'stats': stats})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    logger.info(f"ShareHub stub listening on http://{host}:{port} (set SHAREHUB_BASE_URL to use it)")
+    if not block:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info(f"Stopping ShareHub stub: {stats.snapshot()}")
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local ShareHub stub serving synthetic news and candles")
+    parser.add_argument("--articles", type=int, default=5000, help="Number of generated articles")
+    parser.add_argument("--days", type=int, default=750, help="Trading days of candle history per symbol")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--duplicate-share", type=float, default=0.15, help="Share of articles copying a recent story")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Mean injected latency per request")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Uniform jitter around the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of requests answered with 429")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    args = parser.parse_args()
+    data = SyntheticData(articles=args.articles, days=args.days, seed=args.seed, duplicate_share=args.duplicate_share)
+    faults = FaultInjector(args.latency_ms, args.jitter_ms, args.error_rate, args.throttle_rate, seed=args.seed)
+    serve_stub(data, faults, host=args.host, port=args.port)
@@ -0,0 +1,206 @@
+import pandas as pd
+import pyarrow.parquet as pq
+import logging
+import os
+import sys
+import time
+import uuid
+from urllib.parse import quote, unquote
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Root directory of the columnar store shared by every stage
+STORE_ROOT = os.environ.get("SENTIMETRICS_STORE", r"E:\hey\output\store")
+
+# Typed schemas of the tables exchanged between stages. Every table is partitioned by symbol
+# (one directory per symbol) so readers only open the symbols they ask for; the date column is used
+# for row-level date filtering pushed down into the Parquet reader.
+TABLES = {
+    "news": {
+        "date_column": "publishedDate",
+        "columns": {
+            "symbol": "string", "articleId": "string", "publishedDate": "datetime", "title": "string",
+            "summary": "string", "mediaUrl": "string", "matchedCompany": "string", "matchScore": "float64",
+            "source": "string", "clusterId": "string"
+        }
+    },
+    "sentiment": {
+        "date_column": "publishedDate",
+        "columns": {
+            "symbol": "string", "articleId": "string", "matchedCompany": "string", "publishedDate": "datetime",
+            "mediaUrl": "string", "sentiment_score": "float64", "clusterId": "string"
+        }
+    },
+    "share_weightage": {
+        "date_column": "publishDate",
+        "columns": {
+            "symbol": "string", "articleId": "string", "publishDate": "datetime", "mediaUrl": "string",
+            "sentiment_score": "float64", "price_change_2d (%)": "float64", "predicted_dir": "string",
+            "actual_dir": "string", "media_weight": "float64", "clusterId": "string"
+        }
+    }
+}
+VERSION_FILE = "_last_write"  # Touched on every write so watchers can detect changes with one stat
+PARTITION_PREFIX = "symbol="
+
+# Write a DataFrame to a Parquet file via a temporary name so readers never see a partial file
+def write_parquet(df, path):
+    tmp_path = f"{path}.tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+def table_path(table, root=None):
+    return os.path.join(root or STORE_ROOT, table)
+
+def partition_path(table, symbol, root=None):
+    return os.path.join(table_path(table, root), f"{PARTITION_PREFIX}{quote(str(symbol), safe='')}")
+
+def table_exists(table, root=None):
+    return os.path.exists(os.path.join(table_path(table, root), VERSION_FILE))
+
+# Modification time of the table's last write, None if it was never written
+def table_version(table, root=None):
+    path = os.path.join(table_path(table, root), VERSION_FILE)
+    return os.stat(path).st_mtime_ns if os.path.exists(path) else None
+
+def _mark_written(table, root=None):
+    path = os.path.join(table_path(table, root), VERSION_FILE)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(str(time.time()))
+
+# Bring a DataFrame to a table's schema: missing columns are added empty, extra columns dropped, types cast
+def normalize(table, df):
+    columns = TABLES[table]["columns"]
+    df = df.reindex(columns=list(columns)).copy()
+    for column, dtype in columns.items():
+        if dtype == "datetime":
+            # ShareHub dates mix formats (plain dates and ISO 8601 with Z), so each value is parsed on its own
+            df[column] = pd.to_datetime(df[column], errors='coerce', utc=True,
+                                        format=None if pd.api.types.is_datetime64_any_dtype(df[column]) else 'mixed')
+        elif dtype == "float64":
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype('float64')
+        else:
+            df[column] = df[column].astype(dtype)
+    return df
+
+def list_symbols(table, root=None):
+    path = table_path(table, root)
+    if not os.path.isdir(path):
+        return []
+    return sorted(unquote(name[len(PARTITION_PREFIX):]) for name in os.listdir(path) if name.startswith(PARTITION_PREFIX))
+
+def _partition_files(table, symbol, root=None):
+    path = partition_path(table, symbol, root)
+    if not os.path.isdir(path):
+        return []
+    return [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith('.parquet')]
+
+def _new_part_path(table, symbol, root=None):
+    path = partition_path(table, symbol, root)
+    os.makedirs(path, exist_ok=True)
+    return os.path.join(path, f"part-{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet")
+
+# Append rows; each symbol present gets one new part file
+def append(table, df, root=None):
+    if df.empty:
+        return
+    df = normalize(table, df)
+    for symbol, rows in df.groupby('symbol', sort=False):
+        write_parquet(rows, _new_part_path(table, symbol, root))
+    _mark_written(table, root)
+    logger.info(f"Appended {len(df)} rows to {table} for {df['symbol'].nunique()} symbols")
+
+# Replace one symbol's partition with the given rows
+def _replace_partition(table, symbol, rows, root=None):
+    old_files = _partition_files(table, symbol, root)
+    if not rows.empty:
+        write_parquet(rows, _new_part_path(table, symbol, root))
+    for path in old_files:
+        os.remove(path)
+
+# Insert or replace rows by key; only the partitions of the symbols in df are rewritten
+def upsert(table, df, keys, sort_by=None, root=None):
+    if df.empty:
+        return
+    df = normalize(table, df)
+    for symbol, rows in df.groupby('symbol', sort=False):
+        merged = pd.concat([read(table, symbols=[symbol], root=root), rows], ignore_index=True)
+        merged = merged.drop_duplicates(keys, keep='last')
+        if sort_by:
+            merged = merged.sort_values(sort_by, kind='stable')
+        _replace_partition(table, symbol, merged.reset_index(drop=True), root)
+    _mark_written(table, root)
+    logger.info(f"Upserted {len(df)} rows into {table} for {df['symbol'].nunique()} symbols")
+
+# Replace the whole table with the given rows
+def replace_table(table, df, root=None):
+    df = normalize(table, df)
+    new_symbols = set(df['symbol'].dropna())
+    for symbol in list_symbols(table, root):
+        if symbol not in new_symbols:
+            _replace_partition(table, symbol, df.iloc[0:0], root)
+    for symbol, rows in df.groupby('symbol', sort=False):
+        _replace_partition(table, symbol, rows, root)
+    os.makedirs(table_path(table, root), exist_ok=True)
+    _mark_written(table, root)
+    logger.info(f"Replaced {table} with {len(df)} rows")
+
+# Read typed rows, opening only the requested symbols' partitions and pushing the date range into the reader
+# Part files written before a column was added to a schema read that column as missing
+def read(table, symbols=None, start=None, end=None, columns=None, root=None):
+    date_column = TABLES[table]["date_column"]
+    filters = []
+    if start is not None:
+        filters.append((date_column, '>=', pd.Timestamp(start, tz='UTC') if pd.Timestamp(start).tzinfo is None else pd.Timestamp(start)))
+    if end is not None:
+        filters.append((date_column, '<=', pd.Timestamp(end, tz='UTC') if pd.Timestamp(end).tzinfo is None else pd.Timestamp(end)))
+    frames = []
+    for symbol in (list_symbols(table, root) if symbols is None else symbols):
+        for path in _partition_files(table, symbol, root):
+            file_columns = columns and [column for column in columns if column in pq.read_schema(path).names]
+            frames.append(pd.read_parquet(path, columns=file_columns, filters=filters or None))
+    if not frames:
+        return normalize(table, pd.DataFrame()) if columns is None else normalize(table, pd.DataFrame())[columns]
+    df = pd.concat(frames, ignore_index=True)
+    expected = columns or list(TABLES[table]["columns"])
+    if any(column not in df.columns for column in expected):
+        df = normalize(table, df)[expected]
+    return df
+
+# Merge each partition's part files into one, e.g. after many small appends
+# With keys, rows repeated across part files (e.g. a replayed append) are reduced to the last one
+def compact(table, keys=None, root=None):
+    for symbol in list_symbols(table, root):
+        if len(_partition_files(table, symbol, root)) > 1:
+            rows = read(table, symbols=[symbol], root=root)
+            if keys:
+                rows = rows.drop_duplicates(keys, keep='last').reset_index(drop=True)
+            _replace_partition(table, symbol, rows, root)
+    _mark_written(table, root)
+    logger.info(f"Compacted {table}")
+
+# Export a table to CSV for compatibility: one `{symbol}{suffix}` file per symbol in out_dir, or one file
+def export_csv(table, out_path, suffix=None, root=None):
+    if suffix is None:
+        os.makedirs(os.path.dirname(out_path) or '.', exist_ok=True)
+        read(table, root=root).to_csv(out_path, index=False, encoding="utf-8-sig")
+        logger.info(f"Exported {table} to {out_path}")
+        return
+    os.makedirs(out_path, exist_ok=True)
+    for symbol in list_symbols(table, root):
+        rows = read(table, symbols=[symbol], root=root).drop(columns=['symbol'])
+        rows.to_csv(os.path.join(out_path, f"{quote(symbol, safe='')}{suffix}"), index=False, encoding="utf-8-sig")
+    logger.info(f"Exported {table} to {out_path}")
+
+if __name__ == "__main__":
+    # Usage: python storage.py export <table> <out_path> [suffix]
+    #        python storage.py compact <table>
+    if len(sys.argv) >= 4 and sys.argv[1] == "export":
+        export_csv(sys.argv[2], sys.argv[3], suffix=sys.argv[4] if len(sys.argv) > 4 else None)
+    elif len(sys.argv) == 3 and sys.argv[1] == "compact":
+        compact(sys.argv[2])
+    else:
+        print("Usage: python storage.py export <table> <out_path> [suffix] | python storage.py compact <table>")
+        sys.exit(1)
@@ -0,0 +1,255 @@
+import argparse
+import logging
+import os
+import queue
+import threading
+import time
+import pandas as pd
+from datetime import datetime
+import storage
+import dedupe
+from classified_news import fetch_sharehub_news, classify_news_item, save_news_items, score_news_items
+from sentiment_store import load_sentiment_store, upsert_sentiment, select_latest_sentiment, recent_cluster_scores
+from final_price_prediction import load_media_weightage, load_historical_predictions, adjust_universe_with_sentiment
+from prediction_store import LATEST_FILE, write_predictions
+from logging_setup import setup_logging
+
+# Set up logging through the shared logging queue, so poller, scorers and updater never wait on log I/O
+setup_logging()
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 30  # Seconds between polls of the newest ShareHub page
+MAX_PAGES_PER_POLL = 5  # Pages followed back per poll when more than a page of news arrived
+SCORING_QUEUE_SIZE = 100  # Classified articles waiting for translation and scoring
+UPDATE_QUEUE_SIZE = 500  # Scored articles waiting to be applied to the sentiment store and predictions
+STATS_INTERVAL = 300  # Seconds between latency summaries
+
+# Streaming mode: poll -> classify and cluster -> [scoring queue] -> score -> [update queue] -> sentiment
+# store and that symbol's final prediction.
+#
+# Articles are clustered with the recent stored news (see dedupe.py) and scored like fused ingestion
+# (classified_news.score_news_items): the scorer drains every article waiting, translates each new story
+# once with `scorers` concurrent workers, and copies of a story scored before reuse its score. Articles
+# whose translation failed are not applied; they are in the news table without sentiment, so the batch
+# sentiment stage scores them.
+#
+# Both queues are bounded. When translation falls behind, the scoring queue fills and the poller blocks
+# on it, so ingest slows to the scoring rate instead of buffering without limit. The updater drains every
+# scored article that is waiting, upserts them in one write and recomputes only the symbols they touch.
+# Streamed news is appended as small part files; merging them is left to the batch crawl, which compacts
+# the news table when it finishes, so streaming never rewrites partitions the batch pipeline writes to.
+class StreamingPipeline:
+    def __init__(self, weightage_file, historical_file, output_dir, scorers=2, poll_interval=POLL_INTERVAL,
+                 on_prediction=None):
+        self.weightage_file = weightage_file
+        self.historical_file = historical_file
+        self.output_dir = output_dir
+        self.scorers = scorers
+        self.poll_interval = poll_interval
+        self.on_prediction = on_prediction  # Optional callback(symbol, prediction dict)
+        self.scoring_queue = queue.Queue(maxsize=SCORING_QUEUE_SIZE)
+        self.update_queue = queue.Queue(maxsize=UPDATE_QUEUE_SIZE)
+        self.stop_event = threading.Event()
+        self.threads = []
+        self.seen = set()  # Article ids already ingested, as strings
+        self.latest_rows = {}  # symbol -> its sentiment rows on the latest published date
+        self.clusters = None  # Near-duplicate index, used by the poller only
+        self.cluster_scores = {}  # clusterId -> sentiment score, used by the scorer only
+        self.latencies = []
+        self._input_signature = None
+
+    # Load what the updater needs and the ids already in the news table
+    def prepare(self):
+        news = storage.read("news", columns=['articleId'])
+        self.seen = set(news['articleId'].dropna().astype(str))
+        self.clusters = dedupe.recent_index()
+        self.cluster_scores = recent_cluster_scores(dedupe.recent_start())
+        store = load_sentiment_store()
+        if not store.empty:
+            latest_date = store.groupby('symbol')['publishedDate'].transform('max')
+            latest = store[store['publishedDate'] == latest_date]
+            self.latest_rows = {symbol: rows for symbol, rows in latest.groupby('symbol', sort=False)}
+        self._reload_inputs_if_changed()
+        logger.info(f"Streaming prepared: {len(self.seen)} known articles, latest sentiment for {len(self.latest_rows)} symbols")
+
+    # Reload historical predictions and media weightage when their files changed
+    def _reload_inputs_if_changed(self):
+        historical = self.historical_file
+        if not historical.endswith('.csv'):
+            historical = os.path.join(historical, LATEST_FILE)
+        signature = tuple(os.stat(path).st_mtime_ns if os.path.exists(path) else None
+                          for path in (historical, self.weightage_file))
+        if signature != self._input_signature:
+            self.historical_df = load_historical_predictions(self.historical_file)
+            self.weightage = load_media_weightage(self.weightage_file)
+            self._input_signature = signature
+
+    # Newest articles not seen yet, oldest first, following pagination back until a known article
+    def _new_articles(self):
+        items = []
+        last_id = None
+        for _ in range(MAX_PAGES_PER_POLL):
+            page = fetch_sharehub_news(last_id).get('data') or []
+            fresh = [item for item in page if str(item.get('id', '')) not in self.seen]
+            items.extend(fresh)
+            if len(fresh) < len(page) or not page:
+                break
+            last_id = page[-1].get('id')
+        return list(reversed(items))
+
+    def _poll_loop(self):
+        while not self.stop_event.is_set():
+            try:
+                classified = []
+                for item in self._new_articles():
+                    self.seen.add(str(item.get('id', '')))
+                    result = classify_news_item(item, keep_text=True)
+                    if result:
+                        classified.append(result)
+                if classified:
+                    dedupe.cluster_items(classified, self.clusters)
+                    for result, symbol in zip(classified, save_news_items(classified, quiet=True)['symbol']):
+                        result['symbol'] = symbol
+                for result in classified:
+                    self._put(self.scoring_queue, (time.monotonic(), result), "scoring")
+                if classified:
+                    logger.info(f"Ingested {len(classified)} new articles")
+            except Exception as e:
+                logger.error(f"Error polling news: {e}")
+            self.stop_event.wait(self.poll_interval)
+
+    # Blocking put that reports when a full queue is holding the producer back
+    def _put(self, target, entry, name):
+        try:
+            target.put(entry, timeout=1)
+            return
+        except queue.Full:
+            logger.warning(f"{name} queue full ({target.maxsize}), waiting for consumers")
+        while not self.stop_event.is_set():
+            try:
+                target.put(entry, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+    def _score_loop(self):
+        while not self.stop_event.is_set():
+            try:
+                batch = [self.scoring_queue.get(timeout=1)]
+            except queue.Empty:
+                continue
+            # Score everything already waiting together, so copies of a story are translated once
+            while True:
+                try:
+                    batch.append(self.scoring_queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                score_news_items([article for _, article in batch], self.cluster_scores, max_workers=self.scorers)
+                for entry in batch:
+                    if entry[1]['sentiment_score'] is not None:
+                        self._put(self.update_queue, entry, "update")
+            except Exception as e:
+                logger.error(f"Error scoring {len(batch)} articles: {e}")
+            finally:
+                for _ in batch:
+                    self.scoring_queue.task_done()
+
+    # Apply a batch of scored articles: one store upsert, then one recompute and write for the touched symbols
+    def apply_updates(self, batch):
+        rows = pd.DataFrame([article for _, article in batch])
+        rows['symbol'] = rows['symbol'].astype(str)
+        upsert_sentiment(rows)
+        rows = storage.normalize("sentiment", rows)
+
+        touched = set()
+        for symbol, new_rows in rows.groupby('symbol', sort=False):
+            current = self.latest_rows.get(symbol)
+            merged = new_rows if current is None else pd.concat([current, new_rows], ignore_index=True)
+            merged = merged.drop_duplicates('articleId', keep='last')
+            self.latest_rows[symbol] = merged[merged['publishedDate'] == merged['publishedDate'].max()]
+            touched.add(symbol)
+
+        self._reload_inputs_if_changed()
+        symbols = [symbol for symbol in touched if symbol in self.historical_df.index]
+        if not symbols:
+            logger.info(f"No historical prediction for {', '.join(sorted(touched))}, nothing to recompute")
+            return {}
+        sentiment_df = select_latest_sentiment(pd.concat([self.latest_rows[symbol] for symbol in symbols], ignore_index=True))
+        final_df = adjust_universe_with_sentiment(self.historical_df.loc[symbols], sentiment_df, self.weightage)
+        pred_df = final_df.rename_axis('symbol').reset_index()
+        pred_df.insert(1, 'date', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        write_predictions(pred_df, self.output_dir)
+
+        predictions = final_df[['final_open', 'final_close', 'final_average', 'confidence']].to_dict('index')
+        for symbol, prediction in predictions.items():
+            logger.info(f"Streamed {symbol}: Final Close = {prediction['final_close']:.2f}, Confidence = {prediction['confidence']:.2f}")
+            if self.on_prediction:
+                self.on_prediction(symbol, prediction)
+        return predictions
+
+    def _update_loop(self):
+        last_stats = time.monotonic()
+        while not self.stop_event.is_set():
+            try:
+                batch = [self.update_queue.get(timeout=1)]
+            except queue.Empty:
+                continue
+            # Coalesce everything already waiting into the same write
+            while True:
+                try:
+                    batch.append(self.update_queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.apply_updates(batch)
+                done = time.monotonic()
+                self.latencies.extend(done - enqueued_at for enqueued_at, _ in batch)
+            except Exception as e:
+                logger.error(f"Error applying {len(batch)} streamed articles: {e}")
+            finally:
+                for _ in batch:
+                    self.update_queue.task_done()
+            if time.monotonic() - last_stats >= STATS_INTERVAL:
+                self._log_stats()
+                last_stats = time.monotonic()
+
+    def _log_stats(self):
+        if self.latencies:
+            latencies = sorted(self.latencies)
+            logger.info(f"Streaming latency over {len(latencies)} articles: median {latencies[len(latencies) // 2]:.1f}s, "
+                        f"max {latencies[-1]:.1f}s; queued for scoring {self.scoring_queue.qsize()}, "
+                        f"for update {self.update_queue.qsize()}")
+            self.latencies = []
+
+    def start(self):
+        self.prepare()
+        targets = [self._poll_loop, self._update_loop, self._score_loop]
+        self.threads = [threading.Thread(target=target, daemon=True, name=f"streaming-{i}") for i, target in enumerate(targets)]
+        for thread in self.threads:
+            thread.start()
+        logger.info(f"Streaming started with {self.scorers} scorers, polling every {self.poll_interval}s")
+
+    def stop(self):
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join(timeout=5)
+        self._log_stats()
+        logger.info("Streaming stopped")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream new articles through to adjusted predictions")
+    parser.add_argument("--scorers", type=int, default=2, help="Concurrent translation and scoring workers")
+    parser.add_argument("--poll-interval", type=float, default=POLL_INTERVAL, help="Seconds between news polls")
+    args = parser.parse_args()
+    weightage_file = r"E:\hey\output\weightage\media_weightage.json"
+    historical_file = r"E:\hey\output\history prediction\history_price_prediction"
+    output_dir = r"E:\hey\output\prediction_with_news\final_prediction\share_prediction"
+    pipeline = StreamingPipeline(weightage_file, historical_file, output_dir, scorers=args.scorers,
+                                 poll_interval=args.poll_interval)
+    pipeline.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pipeline.stop()
@@ -0,0 +1,49 @@
+import os
+import tempfile
+
+# Keep any run ledger out of the production metrics directory
+os.environ.setdefault("SENTIMETRICS_METRICS_DIR", tempfile.mkdtemp())
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest import walk_forward, backtest_symbol
+from historical_price_prediction import compute_model_features, predict_historical_price
+
+# Daily candles of a random walk around a high price level, like a NEPSE share
+def candle_frame(days=40, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 1200 * np.exp(np.cumsum(rng.normal(0, 0.02, days)))
+    open_ = close * np.exp(rng.normal(0, 0.01, days))
+    return pd.DataFrame({
+        'publishDate': pd.bdate_range('2025-01-01', periods=days),
+        'Open Price': open_.round(2),
+        'Close Price': close.round(2),
+        'Volume': rng.integers(500, 50000, days),
+    })
+
+# Every walk-forward day must predict what predict_historical_price predicts from the history known that day
+@pytest.mark.parametrize("seed", [7, 11])
+def test_walk_forward_matches_model_on_every_prefix(seed):
+    df = candle_frame(seed=seed)
+    ma, prices, changes = compute_model_features(df)
+    result = walk_forward(ma, prices, changes)
+    leading = len(df) - ma.shape[1]  # Rows without a full moving average or price change
+
+    days = result['predicted'].shape[1]
+    assert days == ma.shape[1] - 2
+    for i in range(days):
+        k = i + 1  # Feature row the model stands on that day
+        predicted_open, predicted_close, _, confidence = predict_historical_price(df.iloc[:leading + k + 1])
+        assert result['predicted'][0, i] == pytest.approx(predicted_open, rel=1e-9)
+        assert result['predicted'][1, i] == pytest.approx(predicted_close, rel=1e-9)
+        assert result['confidence'][i] == pytest.approx(confidence, rel=1e-9, abs=1e-12)
+        assert np.array_equal(result['actual'][:, i], prices[:, k + 1])
+        assert np.array_equal(result['current'][:, i], prices[:, k])
+
+def test_walk_forward_needs_a_training_pair_and_a_next_day():
+    ma, prices, changes = compute_model_features(candle_frame(days=6))
+    assert ma.shape[1] == 2
+    assert walk_forward(ma, prices, changes) is None
+    assert backtest_symbol(candle_frame(days=3)) is None
@@ -0,0 +1,91 @@
+import os
+import tempfile
+import threading
+
+# Keep the run ledger and the news table out of the production directories
+os.environ.setdefault("SENTIMETRICS_METRICS_DIR", tempfile.mkdtemp())
+os.environ.setdefault("SENTIMETRICS_STORE", tempfile.mkdtemp())
+
+import pytest
+
+import news_sources
+import storage
+
+PAGES = 5  # The last page is short, which ends the crawl
+
+# A source of PAGES pages of Nepali stories about Nabil Bank, paged by page number; records each page it serves
+class PagedSource(news_sources.NewsSource):
+    name = "paged"
+
+    def __init__(self):
+        self.served = []
+
+    def fetch(self, cursor=None):
+        page = cursor or 0
+        self.served.append(page)
+        size = news_sources.PAGE_SIZE if page < PAGES - 1 else news_sources.PAGE_SIZE - 2
+        items = [{"id": f"paged-{page}-{i}", "title": f"नबिल बैंकको सञ्चालक समिति बैठक {page} {i}",
+                  "summary": f"नबिल बैंकले {page * 10 + i} प्रतिशत लाभांश प्रस्ताव गर्यो",
+                  "publishedDate": "2025-01-05T10:00:00", "mediaUrl": ""} for i in range(size)]
+        return {"items": items, "next": page + 1, "failed": False}
+
+# classified_news with its news table and log file under tmp_path; the log file is opened relative to the
+# working directory when the module is first imported
+@pytest.fixture
+def crawl(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    import classified_news
+    monkeypatch.setattr(storage, "STORE_ROOT", str(tmp_path / "store"))
+    monkeypatch.setattr(news_sources, "PAGE_SIZE", 5)
+    monkeypatch.setattr(classified_news, "PAGE_QUEUE_SIZE", 2)
+    return classified_news
+
+# A run that fails after flushing a page but before checkpointing it resumes from the last saved cursor:
+# earlier pages are neither fetched nor classified again, and the replayed page leaves no duplicate rows
+def test_crawl_resumes_from_checkpoint_after_failure(crawl, tmp_path, monkeypatch):
+    checkpoint_file = str(tmp_path / "process_news.json")
+    classified = []
+    classify_news_item = crawl.classify_news_item
+    def counting_classify(item, keep_text=False):
+        classified.append(item['id'])
+        return classify_news_item(item, keep_text)
+    monkeypatch.setattr(crawl, "classify_news_item", counting_classify)
+
+    save_news_checkpoint = crawl.save_news_checkpoint
+    def failing_save(checkpoint, checkpoint_file):
+        if checkpoint['pages'] == 3:
+            raise OSError("disk full")
+        save_news_checkpoint(checkpoint, checkpoint_file)
+    monkeypatch.setattr(crawl, "save_news_checkpoint", failing_save)
+
+    monkeypatch.setattr(crawl, "processed_ids", set())
+    source = PagedSource()
+    with pytest.raises(OSError):
+        crawl.process_news(checkpoint_file=checkpoint_file, sources=[source])
+    for thread in threading.enumerate():
+        if thread.name == f"news-{source.name}":
+            thread.join(timeout=5)
+            assert not thread.is_alive()
+
+    checkpoint = crawl.read_news_checkpoint(checkpoint_file)
+    assert not checkpoint['completed']
+    assert checkpoint['sources'][source.name] == {'cursor': 2, 'pages': 2, 'done': False}
+    assert storage.read("news")['articleId'].str.startswith("paged-2-").any()  # Flushed, not checkpointed
+
+    # A new process: nothing classified yet in memory
+    monkeypatch.setattr(crawl, "save_news_checkpoint", save_news_checkpoint)
+    monkeypatch.setattr(crawl, "processed_ids", set())
+    classified.clear()
+    source = PagedSource()
+    crawl.process_news(checkpoint_file=checkpoint_file, sources=[source])
+
+    assert source.served == [2, 3, 4]
+    assert sorted({item_id.split('-')[1] for item_id in classified}) == ['2', '3', '4']
+    checkpoint = crawl.read_news_checkpoint(checkpoint_file)
+    assert checkpoint['completed']
+    assert checkpoint['sources'][source.name]['done']
+
+    news = storage.read("news")
+    assert news['articleId'].is_unique
+    assert len(news) == (PAGES - 1) * 5 + 3
+    assert len(storage._partition_files("news", "NABIL")) == 1
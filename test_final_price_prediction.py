@@ -0,0 +1,79 @@
+import os
+import tempfile
+
+# Keep the run ledger of predict_final_price out of the production metrics directory
+os.environ.setdefault("SENTIMETRICS_METRICS_DIR", tempfile.mkdtemp())
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from final_price_prediction import adjust_with_sentiment, adjust_universe_with_sentiment, predict_final_price
+
+WEIGHTAGE = {
+    "news.example.com": {"average_weight": 0.8},
+    "blog.example.com": {"average_weight": 0.0},
+}
+
+# Latest historical predictions, indexed by symbol; EBL's confidence is missing
+def historical_frame():
+    return pd.DataFrame({
+        'symbol': ['NABIL', 'EBL', 'NICA', 'SHL', 'NHPC', 'UNL'],
+        'predicted_open': [500.0, 610.5, 720.0, 330.25, 250.0, 42000.0],
+        'predicted_close': [510.0, 605.0, 730.5, 335.0, 251.5, 41800.0],
+        'predicted_average': [505.0, 607.75, 725.25, 332.6, 250.75, 41900.0],
+        'confidence': [0.4, np.nan, 0.7, 0.2, 0.9, 0.5],
+    }).set_index('symbol')
+
+# Latest sentiment rows per symbol: NABIL has two (the last one counts), EBL a zero media weight, NICA a
+# zero score, SHL an unknown outlet (default weight) and a negative score; NHPC and UNL have none
+def sentiment_frame():
+    return pd.DataFrame({
+        'symbol': ['NABIL', 'NABIL', 'EBL', 'NICA', 'SHL'],
+        'articleId': ['NABIL-1', 'NABIL-2', 'EBL-1', 'NICA-1', 'SHL-1'],
+        'publishedDate': pd.to_datetime(['2025-07-28'] * 5),
+        'sentiment_score': [0.9, 0.35, 0.6, 0.0, -0.55],
+        'mediaUrl': ['https://news.example.com/a', 'https://news.example.com/b', 'https://blog.example.com/c',
+                     'https://news.example.com/d', 'https://other.example.org/e'],
+    })
+
+# Per-symbol reference: adjust_with_sentiment on open, close and average with the symbol's sentiment rows
+def reference(historical_df, sentiment_df, weightage):
+    rows = {}
+    for symbol, historical in historical_df.iterrows():
+        symbol_sentiment = sentiment_df[sentiment_df['symbol'] == symbol]
+        final_open, confidence = adjust_with_sentiment(historical['predicted_open'], symbol_sentiment, weightage)
+        final_close, _ = adjust_with_sentiment(historical['predicted_close'], symbol_sentiment, weightage)
+        final_average, _ = adjust_with_sentiment(historical['predicted_average'], symbol_sentiment, weightage)
+        rows[symbol] = {'final_open': final_open, 'final_close': final_close, 'final_average': final_average,
+                        'confidence': confidence}
+    return pd.DataFrame.from_dict(rows, orient='index')
+
+def test_vectorized_adjustment_matches_per_symbol_reference():
+    historical_df, sentiment_df = historical_frame(), sentiment_frame()
+    expected = reference(historical_df, sentiment_df, WEIGHTAGE)
+    final_df = adjust_universe_with_sentiment(historical_df, sentiment_df, WEIGHTAGE)
+
+    assert list(final_df.index) == list(historical_df.index)
+    pd.testing.assert_frame_equal(final_df[expected.columns], expected, check_names=False)
+    # Symbols without sentiment keep their historical prices with zero confidence
+    assert (final_df.loc[['NHPC', 'UNL'], 'confidence'] == 0).all()
+    assert (final_df.loc[['NHPC', 'UNL'], 'final_close'] == historical_df.loc[['NHPC', 'UNL'], 'predicted_close']).all()
+
+def test_vectorized_adjustment_without_any_sentiment():
+    historical_df = historical_frame()
+    expected = reference(historical_df, sentiment_frame().iloc[0:0], WEIGHTAGE)
+    for sentiment_df in (None, sentiment_frame().iloc[0:0]):
+        final_df = adjust_universe_with_sentiment(historical_df, sentiment_df, WEIGHTAGE)
+        pd.testing.assert_frame_equal(final_df[expected.columns], expected, check_names=False)
+
+def test_predict_final_price_matches_per_symbol_reference(tmp_path):
+    historical_df, sentiment_df = historical_frame(), sentiment_frame()
+    expected = reference(historical_df, sentiment_df, WEIGHTAGE)
+    predictions = predict_final_price(None, None, None, str(tmp_path), weightage=WEIGHTAGE,
+                                      historical_df=historical_df, sentiment_df=sentiment_df)
+
+    assert set(predictions) == set(expected.index)
+    for symbol, prediction in predictions.items():
+        for column in expected.columns:
+            assert prediction[column] == pytest.approx(expected.loc[symbol, column], rel=1e-12, abs=0)